@@ -19,38 +19,106 @@
 # https://cyclonedx.org/docs/1.6/json/
 
 import argparse
+import dataclasses
 import json
 import os
-import shutil
 import sys
 import typing
 import warnings
+from pathlib import Path
 
+# base is imported first, because it checks the Python version.
 import base
-import base_versions
-import cyclonedx.generic_component
-import cyclonedx.util
-import git.submodule_parsing
-import high_level.document
-import meson.depmf
-import meson.wrap_info
-import proj_types
 import shared_arguments
-from alpine_native import AlpinePackageVersions
-from cyclonedx.generators import Lifecycles
-from cyclonedx.generic_component import (
-    ComponentSupplier,
-    ComponentType,
-    ReferenceType,
-)
-from cyclonedx.util import Licenses
-from purldb.generate import generate as purldb_mod_generate
 from purldb.keys import PurlNames
 
 _CrossVersionsSelf = typing.TypeVar("_CrossVersionsSelf", bound="_CrossVersions")
 
+# Setting the SBOM_MINIMAL environment variable to 1 omits the human-readable
+# descriptions of the Alpine-specific components to make the SBOM smaller.
+_SBOM_MINIMAL = os.environ.get("SBOM_MINIMAL") == "1"
+
+# Components android-tools-static depends on, grouped by their origin. libusb is
+# handled separately, because it may come either from a submodule or from a Wrap.
+_GITHUB_REFS = (PurlNames.github_runner, PurlNames.action_gh_release)
+_SUBMODULE_REFS = (
+    PurlNames.ags_core,
+    PurlNames.ags_extras,
+    PurlNames.ags_selinux,
+    # PurlNames.ags_f2fs_tools,
+    # PurlNames.ags_e2fsprogs,
+    PurlNames.boringssl,
+    PurlNames.ags_mkbootimg,
+    PurlNames.ags_avb,
+    PurlNames.ags_libbase,
+    PurlNames.ags_libziparchive,
+    PurlNames.ags_adb,
+    PurlNames.ags_logging,
+    # PurlNames.ags_libufdt,
+)
+_WRAP_REFS = (
+    PurlNames.wrap_fmt,
+    PurlNames.wrap_zlib,
+    PurlNames.wrap_google_brotli,
+    PurlNames.wrap_lz4,
+    PurlNames.wrap_zstd,
+    PurlNames.wrap_gtest,
+    PurlNames.wrap_abseil_cpp,
+    PurlNames.wrap_protobuf,
+    PurlNames.wrap_pcre2,
+)
+_ALPINE_REFS = (
+    PurlNames.alpine,
+    PurlNames.alpine_meson,
+    PurlNames.alpine_gcc,
+    PurlNames.alpine_gpp,
+    PurlNames.alpine_cmake,
+    PurlNames.alpine_linux_headers,
+)
+_TOOLCHAIN_REFS = (
+    PurlNames.musl_cross_make,
+    PurlNames.docker_setup_buildx,
+    PurlNames.docker_login,
+    PurlNames.docker_metadata,
+    PurlNames.docker_bake,
+)
+# Components musl-cross-make depends on.
+_MUSL_CROSS_MAKE_REFS = (
+    PurlNames.gcc_binutils,
+    PurlNames.gcc_gcc,
+    PurlNames.gcc_musl,
+    PurlNames.gcc_gmp,
+    PurlNames.gcc_mpc,
+    PurlNames.gcc_mpfr,
+    PurlNames.gcc_linux,
+    PurlNames.gcc_isl,
+)
+
+# Keys of /version-info.json in the order of _CrossVersions fields.
+_VERSION_FILE_KEYS = (
+    "alpine",
+    "musl-cross-make",
+    "binutils",
+    "gcc",
+    "musl",
+    "gmp",
+    "mpc",
+    "mpfr",
+    "linux",
+    "isl",
+    "docker/setup-buildx-action",
+    "docker/login-action",
+    "docker/metadata-action",
+    "docker/bake-action",
+)
+
 
-class _CrossVersions(typing.NamedTuple):
+def _description(description: str) -> str | None:
+    return None if _SBOM_MINIMAL else description
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _CrossVersions:
     alpine: str
     musl_cross_make: str
     binutils: str
@@ -68,36 +136,63 @@ class _CrossVersions(typing.NamedTuple):
 
     @classmethod
     def read_root_version_file(cls: type[_CrossVersionsSelf]) -> _CrossVersionsSelf:
-        with open("/version-info.json") as input:
-            doc = json.load(input)
-        return cls(
-            alpine=doc["alpine"],
-            musl_cross_make=doc["musl-cross-make"],
-            binutils=doc["binutils"],
-            gcc=doc["gcc"],
-            musl=doc["musl"],
-            gmp=doc["gmp"],
-            mpc=doc["mpc"],
-            mpfr=doc["mpfr"],
-            linux=doc["linux"],
-            isl=doc["isl"],
-            setup_buildx_action=doc["docker/setup-buildx-action"],
-            login_action=doc["docker/login-action"],
-            metadata_action=doc["docker/metadata-action"],
-            bake_action=doc["docker/bake-action"],
-        )
+        doc = json.loads(Path("/version-info.json").read_bytes())
+        return cls(*(doc[key] for key in _VERSION_FILE_KEYS))
 
 
-if __name__ == "__main__":
-    #
-    # Load shared command line arguments and add Windows-specific ones.
-    #
+def get_argument_parser() -> argparse.ArgumentParser:
+    """Get the argument parser of this script."""
     parser = argparse.ArgumentParser(
         description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     shared_arguments.add(parser)
-    args = parser.parse_args()
+    parser.add_argument(
+        "--sbom-cache",
+        help=(
+            "Reuse the SBOM generated by a previous run with the same inputs and "
+            "store the result for future runs. The extracted Wrap subprojects are not "
+            "checked when a cached SBOM is reused"
+        ),
+        action="store_true",
+    )
+    return parser
+
+
+def generate(args: argparse.Namespace) -> bytes:
+    """Generate the SBOM.
+
+    This function may be called repeatedly in a single process.
+
+    Arguments:
+        args: Parsed command line arguments (see get_argument_parser()).
+
+    Returns:
+        The serialized SBOM document.
+    """
+    # Most modules are imported here, so that --help and argument errors don't have to
+    # wait for them.
+    import concurrent.futures
+    import itertools
+
+    import base_versions
+    import cyclonedx.generic_component
+    import cyclonedx.util
+    import git.submodule_parsing
+    import high_level.document
+    import meson.depmf
+    import meson.wrap_info
+    import proj_types
+    import sbom_cache
+    from alpine_native import AlpinePackageVersions
+    from cyclonedx.generators import Lifecycles
+    from cyclonedx.generic_component import (
+        ComponentSupplier,
+        ComponentType,
+        ReferenceType,
+    )
+    from cyclonedx.util import Licenses
+    from purldb.generate import generate as purldb_mod_generate
 
     #
     # Preliminary command line argument processing.
@@ -107,54 +202,83 @@ if __name__ == "__main__":
     depmf_wrap_dict = meson.depmf.get_subproject_data(args.meson_depmf_file)
 
     # Infer some info from the depmf.json file.
-    project_version = depmf_wrap_dict["android-tools-static"].version
+    project_version = meson.depmf.get_version(depmf_wrap_dict, "android-tools-static")
     uses_bundled_libusb = args.uses_bundled_libusb == "true"
 
-    assert project_version is not None
-
-    match args.color:
-        case "always":
-            color = True
-        case "never":
-            color = False
-        case "auto":
-            # https://no-color.org/
-            if "NO_COLOR" in os.environ and len(os.environ["NO_COLOR"]) != 0:
-                color = False
-            else:
-                color = sys.stderr.isatty()
-        case _:
-            sys.exit(
-                f"Unknown color value '{args.color}'! This is likely a bug in the "
-                "script"
-            )
-
-    if color:
-        warnings.formatwarning = base.ansi_warning_format
-
     target = base.Target(args.target_architecture, base.TargetOS.LINUX)
 
     #
     # Look for git.
     #
-    git_path = shutil.which("git")
+    git_path = base.find_git()
     if git_path is None:
         sys.exit("Couldn't find 'git' executable! Cannot proceed with SBOM generation.")
 
+    cross_versions = _CrossVersions.read_root_version_file()
+
+    apk_versions = AlpinePackageVersions.from_apk()
+
     #
-    # Process input from various places.
+    # Reuse the result of a previous run if none of the inputs have changed.
     #
-    base_vers = base_versions.get_base_versions(source_dir)
-
-    repo_link = high_level.document.handle_repolink(
-        args.repolink_format, args.ref, git_path, source_dir
-    )
+    cache_key = None
+    if args.sbom_cache:
+        cache_key = sbom_cache.compute_key(
+            args,
+            (
+                Path("/version-info.json"),
+                args.meson_depmf_file,
+                args.nmeum_patch_series_file,
+                args.added_patch_series_file,
+            ),
+            (repr(apk_versions), repr(_SBOM_MINIMAL)),
+            git_path,
+            source_dir,
+        )
+        if cache_key is not None and (cached := sbom_cache.load(cache_key)):
+            return cached
 
-    submodule_info = git.submodule_parsing.read_submodule_info(
-        source_dir, git_path, uses_bundled_libusb, target
-    )
+    #
+    # Process input from various places.
+    #
+    # These steps are independent of each other and mostly wait for git or for file
+    # I/O, so they are run concurrently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+        base_vers_future = executor.submit(base_versions.get_base_versions, source_dir)
+        repo_link_future = executor.submit(
+            high_level.document.handle_repolink,
+            args.repolink_format,
+            args.ref,
+            git_path,
+            source_dir,
+        )
+        submodule_info_future = executor.submit(
+            git.submodule_parsing.read_submodule_info,
+            source_dir,
+            git_path,
+            uses_bundled_libusb,
+            target,
+        )
+        wraps_future = executor.submit(
+            meson.wrap_info.get_wraps_info, depmf_wrap_dict, source_dir, target
+        )
+        nmeum_patch_list_future = executor.submit(
+            high_level.document.read_patch_series,
+            args.nmeum_patch_series_file,
+            source_dir,
+        )
+        added_patch_list_future = executor.submit(
+            high_level.document.read_patch_series,
+            args.added_patch_series_file,
+            source_dir,
+        )
 
-    wraps = meson.wrap_info.get_wraps_info(depmf_wrap_dict, source_dir, target)
+    base_vers = base_vers_future.result()
+    repo_link = repo_link_future.result()
+    submodule_info = submodule_info_future.result()
+    wraps = wraps_future.result()
+    nmeum_patch_list = nmeum_patch_list_future.result()
+    added_patch_list = added_patch_list_future.result()
 
     #
     # Assemble the input into processed components shared across all SBOM entrypoint
@@ -182,8 +306,8 @@ if __name__ == "__main__":
         args.github_runner_name_ver,
         args.softprops_action_gh_release_version,
         args.base_repolink,
-        args.nmeum_patch_series_file,
-        args.added_patch_series_file,
+        nmeum_patch_list,
+        added_patch_list,
         submodule_info,
         wraps,
         depmf_wrap_dict,
@@ -193,34 +317,35 @@ if __name__ == "__main__":
     #
     # Handle Linux-specific stuff.
     #
-    cross_versions = _CrossVersions.read_root_version_file()
-
-    apk_versions = AlpinePackageVersions.from_apk()
-
-    for purl, ver in (
-        (PurlNames.alpine, cross_versions.alpine),
-        (PurlNames.alpine_meson, apk_versions.meson),
-        (PurlNames.alpine_gcc, apk_versions.gcc),
-        # It is assumed that the version of gcc and g++ is identical.
-        (PurlNames.alpine_gpp, apk_versions.gcc),
-        (PurlNames.alpine_cmake, apk_versions.cmake),
-        (PurlNames.alpine_linux_headers, apk_versions.linux_headers),
-        (PurlNames.musl_cross_make, cross_versions.musl_cross_make),
-        (PurlNames.docker_setup_buildx, cross_versions.setup_buildx_action),
-        (PurlNames.docker_login, cross_versions.login_action),
-        (PurlNames.docker_metadata, cross_versions.metadata_action),
-        (PurlNames.docker_bake, cross_versions.bake_action),
-        (PurlNames.gcc_binutils, cross_versions.binutils),
-        (PurlNames.gcc_gcc, cross_versions.gcc),
-        (PurlNames.gcc_musl, cross_versions.musl),
-        (PurlNames.gcc_gmp, cross_versions.gmp),
-        (PurlNames.gcc_mpc, cross_versions.mpc),
-        (PurlNames.gcc_mpfr, cross_versions.mpfr),
-        (PurlNames.gcc_linux, cross_versions.linux),
-        (PurlNames.gcc_isl, cross_versions.isl),
-    ):
-        purldb[purl] = proj_types.Purl(f"{purl}@{ver}")
-        pass
+    # The purls are referenced by many components and dependency lists, intern them so
+    # that all of the references share a single string object.
+    purldb.update(
+        {
+            purl: proj_types.Purl(sys.intern(f"{purl}@{ver}"))
+            for purl, ver in (
+                (PurlNames.alpine, cross_versions.alpine),
+                (PurlNames.alpine_meson, apk_versions.meson),
+                (PurlNames.alpine_gcc, apk_versions.gcc),
+                # It is assumed that the version of gcc and g++ is identical.
+                (PurlNames.alpine_gpp, apk_versions.gcc),
+                (PurlNames.alpine_cmake, apk_versions.cmake),
+                (PurlNames.alpine_linux_headers, apk_versions.linux_headers),
+                (PurlNames.musl_cross_make, cross_versions.musl_cross_make),
+                (PurlNames.docker_setup_buildx, cross_versions.setup_buildx_action),
+                (PurlNames.docker_login, cross_versions.login_action),
+                (PurlNames.docker_metadata, cross_versions.metadata_action),
+                (PurlNames.docker_bake, cross_versions.bake_action),
+                (PurlNames.gcc_binutils, cross_versions.binutils),
+                (PurlNames.gcc_gcc, cross_versions.gcc),
+                (PurlNames.gcc_musl, cross_versions.musl),
+                (PurlNames.gcc_gmp, cross_versions.gmp),
+                (PurlNames.gcc_mpc, cross_versions.mpc),
+                (PurlNames.gcc_mpfr, cross_versions.mpfr),
+                (PurlNames.gcc_linux, cross_versions.linux),
+                (PurlNames.gcc_isl, cross_versions.isl),
+            )
+        }
+    )
 
     alpine_supplier = ComponentSupplier(
         name="Alpine Linux official repository", url="https://www.alpinelinux.org/"
@@ -229,61 +354,24 @@ if __name__ == "__main__":
 
     toolchain_components = [
         cyclonedx.generic_component.generate(
-            name="binutils",
-            version=cross_versions.binutils,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_binutils],
-            description=("binutils components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="gcc",
-            version=cross_versions.gcc,
+            name=name,
+            version=version,
             c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_gcc],
-            description=("gcc components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="musl",
-            version=cross_versions.musl,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_musl],
-            description=("musl components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="gmp",
-            version=cross_versions.gmp,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_gmp],
-            description=("gmp components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="mpc",
-            version=cross_versions.mpc,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_mpc],
-            description=("mpc components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="mpfr",
-            version=cross_versions.mpfr,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_mpfr],
-            description=("mpfr components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="linux",
-            version=cross_versions.linux,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_linux],
-            description=("Linux headers components of musl-cross-make gcc toolchain"),
-        ),
-        cyclonedx.generic_component.generate(
-            name="isl",
-            version=cross_versions.isl,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.gcc_isl],
-            description=("isl components of musl-cross-make gcc toolchain"),
-        ),
+            ref=purldb[purl],
+            description=_description(
+                f"{subject} components of musl-cross-make gcc toolchain"
+            ),
+        )
+        for name, version, purl, subject in (
+            ("binutils", cross_versions.binutils, PurlNames.gcc_binutils, "binutils"),
+            ("gcc", cross_versions.gcc, PurlNames.gcc_gcc, "gcc"),
+            ("musl", cross_versions.musl, PurlNames.gcc_musl, "musl"),
+            ("gmp", cross_versions.gmp, PurlNames.gcc_gmp, "gmp"),
+            ("mpc", cross_versions.mpc, PurlNames.gcc_mpc, "mpc"),
+            ("mpfr", cross_versions.mpfr, PurlNames.gcc_mpfr, "mpfr"),
+            ("linux", cross_versions.linux, PurlNames.gcc_linux, "Linux headers"),
+            ("isl", cross_versions.isl, PurlNames.gcc_isl, "isl"),
+        )
     ]
 
     musl_cross_make = cyclonedx.generic_component.generate(
@@ -291,7 +379,9 @@ if __name__ == "__main__":
         version=cross_versions.musl_cross_make,
         c_type=ComponentType.application,
         ref=purldb[PurlNames.musl_cross_make],
-        description="Primary toolchain used build android-tools-static for target architecture",
+        description=_description(
+            "Primary toolchain used build android-tools-static for target architecture"
+        ),
         references=[
             cyclonedx.generic_component.generate_reference(
                 type=ReferenceType.website,
@@ -307,213 +397,163 @@ if __name__ == "__main__":
         "https://github.com/richfelker/musl-cross-make/blob/master/LICENSE",
     )
 
-    docker_setup_buildx = cyclonedx.generic_component.generate(
-        name="docker/setup-buildx-action",
-        version=cross_versions.setup_buildx_action,
-        c_type=ComponentType.library,
-        ref=purldb[PurlNames.docker_setup_buildx],
-        description=("GitHub Action used to setup Docker buildx environment."),
-        supplier=github_supplier,
-        references=[
-            cyclonedx.generic_component.generate_reference(
-                type=ReferenceType.website,
-                url="https://github.com/docker/setup-buildx-action",
-            )
-        ],
-    )
-    docker_login = cyclonedx.generic_component.generate(
-        name="docker/login-action",
-        version=cross_versions.login_action,
-        c_type=ComponentType.library,
-        ref=purldb[PurlNames.docker_login],
-        description=("GitHub Action used to login to GitHub Container Registry."),
-        supplier=github_supplier,
-        references=[
-            cyclonedx.generic_component.generate_reference(
-                type=ReferenceType.website,
-                url="https://github.com/docker/login-action",
-            )
-        ],
-    )
-    docker_metadata = cyclonedx.generic_component.generate(
-        name="docker/metadata-action",
-        version=cross_versions.metadata_action,
-        c_type=ComponentType.library,
-        ref=purldb[PurlNames.docker_metadata],
-        description=("GitHub Action used to handle Docker image metadata."),
-        supplier=github_supplier,
-        references=[
-            cyclonedx.generic_component.generate_reference(
-                type=ReferenceType.website,
-                url="https://github.com/docker/metadata-action",
-            )
-        ],
-    )
-    docker_bake = cyclonedx.generic_component.generate(
-        name="docker/bake-action",
-        version=cross_versions.bake_action,
-        c_type=ComponentType.library,
-        ref=purldb[PurlNames.docker_bake],
-        description=(
-            "GitHub Action used build and publish Docker images containing "
-            "musl-cross-make cross-compilers used to compile android-tools-static."
-        ),
-        supplier=github_supplier,
-        references=[
-            cyclonedx.generic_component.generate_reference(
-                type=ReferenceType.website,
-                url="https://github.com/docker/bake-action",
-            )
-        ],
-    )
+    docker_components = {
+        action_name: cyclonedx.generic_component.generate(
+            name=f"docker/{action_name}",
+            version=version,
+            c_type=ComponentType.library,
+            ref=purldb[purl],
+            description=_description(description),
+            supplier=github_supplier,
+            references=[
+                cyclonedx.generic_component.generate_reference(
+                    type=ReferenceType.website,
+                    url=f"https://github.com/docker/{action_name}",
+                )
+            ],
+        )
+        for action_name, version, purl, description in (
+            (
+                "setup-buildx-action",
+                cross_versions.setup_buildx_action,
+                PurlNames.docker_setup_buildx,
+                "GitHub Action used to setup Docker buildx environment.",
+            ),
+            (
+                "login-action",
+                cross_versions.login_action,
+                PurlNames.docker_login,
+                "GitHub Action used to login to GitHub Container Registry.",
+            ),
+            (
+                "metadata-action",
+                cross_versions.metadata_action,
+                PurlNames.docker_metadata,
+                "GitHub Action used to handle Docker image metadata.",
+            ),
+            (
+                "bake-action",
+                cross_versions.bake_action,
+                PurlNames.docker_bake,
+                "GitHub Action used build and publish Docker images containing "
+                "musl-cross-make cross-compilers used to compile android-tools-static.",
+            ),
+        )
+    }
 
-    for component, url in (
-        (
-            docker_setup_buildx,
-            "https://github.com/docker/setup-buildx-action/blob/master/LICENSE",
-        ),
-        (docker_login, "https://github.com/docker/login-action/blob/master/LICENSE"),
-        (
-            docker_metadata,
-            "https://github.com/docker/metadata-action/blob/master/LICENSE",
-        ),
-        (docker_bake, "https://github.com/docker/bake-action/blob/master/LICENSE"),
-    ):
-        cyclonedx.util.set_license(component, Licenses.APACHE, url)
+    for action_name, component in docker_components.items():
+        cyclonedx.util.set_license(
+            component,
+            Licenses.APACHE,
+            f"https://github.com/docker/{action_name}/blob/master/LICENSE",
+        )
 
-    linux_components = [
-        cyclonedx.generic_component.generate(
-            name="Alpine Linux",
-            version=cross_versions.alpine,
-            c_type=ComponentType.operating_system,
-            ref=purldb[PurlNames.alpine],
-            supplier=ComponentSupplier(
-                name="Docker Hub", url="https://hub.docker.com/"
+    components = document["components"]
+    components.extend(
+        (
+            cyclonedx.generic_component.generate(
+                name="Alpine Linux",
+                version=cross_versions.alpine,
+                c_type=ComponentType.operating_system,
+                ref=purldb[PurlNames.alpine],
+                supplier=ComponentSupplier(
+                    name="Docker Hub", url="https://hub.docker.com/"
+                ),
+                description=_description(
+                    "Stable version of Alpine Linux used to build android-tools-static"
+                ),
             ),
-            description=(
-                "Stable version of Alpine Linux used to build android-tools-static"
+            cyclonedx.generic_component.generate(
+                name="Meson",
+                version=apk_versions.meson,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_meson],
+                description=_description("Meson build system"),
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"meson-{apk_versions.meson}"},
             ),
-        ),
-        cyclonedx.generic_component.generate(
-            name="Meson",
-            version=apk_versions.meson,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_meson],
-            description="Meson build system",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"meson-{apk_versions.meson}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="GCC",
-            version=apk_versions.gcc,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_gcc],
-            description="GNU Compiler Collection - native version",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"gcc-{apk_versions.gcc}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="G++",
-            version=apk_versions.gcc,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_gpp],
-            description="GNU Compiler Collection - C++ compiler, native version",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"g++-{apk_versions.gcc}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="CMake",
-            version=apk_versions.cmake,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_cmake],
-            description="CMake build system",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"cmake-{apk_versions.cmake}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="linux-headers",
-            version=apk_versions.linux_headers,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.alpine_linux_headers],
-            description="Linux kernel headers - native version",
-            supplier=alpine_supplier,
-            properties={
-                "alpine_pkg_name": f"linux-headers-{apk_versions.linux_headers}"
-            },
-        ),
-        musl_cross_make,
-        docker_setup_buildx,
-        docker_login,
-        docker_metadata,
-        docker_bake,
-    ]
+            cyclonedx.generic_component.generate(
+                name="GCC",
+                version=apk_versions.gcc,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_gcc],
+                description=_description("GNU Compiler Collection - native version"),
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"gcc-{apk_versions.gcc}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="G++",
+                version=apk_versions.gcc,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_gpp],
+                description=_description(
+                    "GNU Compiler Collection - C++ compiler, native version"
+                ),
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"g++-{apk_versions.gcc}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="CMake",
+                version=apk_versions.cmake,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_cmake],
+                description=_description("CMake build system"),
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"cmake-{apk_versions.cmake}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="linux-headers",
+                version=apk_versions.linux_headers,
+                c_type=ComponentType.library,
+                ref=purldb[PurlNames.alpine_linux_headers],
+                description=_description("Linux kernel headers - native version"),
+                supplier=alpine_supplier,
+                properties={
+                    "alpine_pkg_name": f"linux-headers-{apk_versions.linux_headers}"
+                },
+            ),
+            musl_cross_make,
+        )
+    )
+    components.extend(docker_components.values())
 
-    document["components"].extend(linux_components)
+    libusb_ref = PurlNames.libusb if uses_bundled_libusb else PurlNames.wrap_libusb
 
     document["dependencies"] = [
         {
             "ref": purldb[PurlNames.android_tools_static],
             "dependsOn": [
-                purldb[PurlNames.github_runner],
-                purldb[PurlNames.action_gh_release],
-                purldb[PurlNames.ags_core],
-                purldb[PurlNames.ags_extras],
-                purldb[PurlNames.ags_selinux],
-                # purldb[PurlNames.ags_f2fs_tools]
-                # purldb[PurlNames.ags_e2fsprogs]
-                purldb[PurlNames.boringssl],
-                purldb[PurlNames.ags_mkbootimg],
-                purldb[PurlNames.ags_avb],
-                purldb[PurlNames.ags_libbase],
-                purldb[PurlNames.ags_libziparchive],
-                purldb[PurlNames.ags_adb],
-                purldb[PurlNames.ags_logging],
-                # purldb[PurlNames.ags_libufdt]
-                purldb[PurlNames.wrap_fmt],
-                purldb[PurlNames.wrap_zlib],
-                purldb[PurlNames.wrap_google_brotli],
-                purldb[PurlNames.wrap_lz4],
-                purldb[PurlNames.wrap_zstd],
-                purldb[PurlNames.wrap_gtest],
-                purldb[PurlNames.wrap_abseil_cpp],
-                purldb[PurlNames.wrap_protobuf],
-                purldb[PurlNames.wrap_pcre2],
-                purldb[PurlNames.alpine],
-                purldb[PurlNames.alpine_meson],
-                purldb[PurlNames.alpine_gcc],
-                purldb[PurlNames.alpine_gpp],
-                purldb[PurlNames.alpine_cmake],
-                purldb[PurlNames.alpine_linux_headers],
-                purldb[PurlNames.musl_cross_make],
-                purldb[PurlNames.docker_setup_buildx],
-                purldb[PurlNames.docker_login],
-                purldb[PurlNames.docker_metadata],
-                purldb[PurlNames.docker_bake],
+                purldb[purl]
+                for purl in dict.fromkeys(
+                    itertools.chain(
+                        _GITHUB_REFS,
+                        _SUBMODULE_REFS,
+                        _WRAP_REFS,
+                        _ALPINE_REFS,
+                        _TOOLCHAIN_REFS,
+                        (libusb_ref,),
+                    )
+                )
             ],
         },
         {
             "ref": purldb[PurlNames.musl_cross_make],
-            "dependsOn": [
-                purldb[PurlNames.gcc_binutils],
-                purldb[PurlNames.gcc_gcc],
-                purldb[PurlNames.gcc_musl],
-                purldb[PurlNames.gcc_gmp],
-                purldb[PurlNames.gcc_mpc],
-                purldb[PurlNames.gcc_mpfr],
-                purldb[PurlNames.gcc_linux],
-                purldb[PurlNames.gcc_isl],
-            ],
+            "dependsOn": [purldb[purl] for purl in _MUSL_CROSS_MAKE_REFS],
         },
     ]
 
-    dependsOn = document["dependencies"][0]["dependsOn"]  # noqa: N816
+    output = base.encode_document(document)
+
+    if cache_key is not None:
+        sbom_cache.store(cache_key, output)
+
+    return output
 
-    if uses_bundled_libusb:
-        dependsOn.append(purldb[PurlNames.libusb])
-    else:
-        dependsOn.append(purldb[PurlNames.wrap_libusb])
 
-    try:
-        json.dump(document, sys.stdout)
-    except OSError as exc:
-        sys.exit(str(exc))
+if __name__ == "__main__":
+    args = get_argument_parser().parse_args()
+
+    if args.color:
+        warnings.formatwarning = base.ansi_warning_format
+
+    base.write_output(generate(args))
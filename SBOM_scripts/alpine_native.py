@@ -19,8 +19,7 @@
 # https://cyclonedx.org/docs/1.6/json/
 
 import argparse
-import json
-import os
+import functools
 import shlex
 import shutil
 import subprocess
@@ -53,6 +52,89 @@ _AlpinePackageVersionsSelf = typing.TypeVar(
 )
 
 
+# Components android-tools-static depends on. libusb is handled separately, because it
+# may come either from a submodule or from a Wrap.
+_ALPINE_DEPENDS_KEYS = (
+    PurlNames.github_runner,
+    PurlNames.action_gh_release,
+    PurlNames.ags_core,
+    PurlNames.ags_extras,
+    PurlNames.ags_selinux,
+    # PurlNames.ags_f2fs_tools,
+    # PurlNames.ags_e2fsprogs,
+    PurlNames.boringssl,
+    PurlNames.ags_mkbootimg,
+    PurlNames.ags_avb,
+    PurlNames.ags_libbase,
+    PurlNames.ags_libziparchive,
+    PurlNames.ags_adb,
+    PurlNames.ags_logging,
+    # PurlNames.ags_libufdt,
+    PurlNames.wrap_fmt,
+    PurlNames.wrap_zlib,
+    PurlNames.wrap_google_brotli,
+    PurlNames.wrap_lz4,
+    PurlNames.wrap_zstd,
+    PurlNames.wrap_gtest,
+    PurlNames.wrap_abseil_cpp,
+    PurlNames.wrap_protobuf,
+    PurlNames.wrap_pcre2,
+    PurlNames.alpine,
+    PurlNames.alpine_meson,
+    PurlNames.alpine_gcc,
+    PurlNames.alpine_gpp,
+    PurlNames.alpine_cmake,
+    PurlNames.alpine_linux_headers,
+    PurlNames.setup_alpine,
+)
+
+
+@functools.cache
+def _get_apk_versions() -> dict[str, str]:
+    apk_exe = shutil.which("apk")
+    if apk_exe is None:
+        raise RuntimeError(
+            "Couldn't find 'apk' executable! Are you running this script outside "
+            "of Alpine Linux?"
+        )
+    # Apk package names and their corresponding field names.
+    pkg_names = {
+        "meson": "meson",
+        "gcc": "gcc",
+        "cmake": "cmake",
+        "linux-headers": "linux_headers",
+    }
+    # All packages are queried at once to avoid executing apk repeatedly.
+    args = [apk_exe, "list", "--installed", *pkg_names]
+    proc = subprocess.run(
+        args=args,
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    result = {}
+    for line in proc.stdout.splitlines():
+        if not line:
+            continue
+        pkgver = line.split(maxsplit=1)[0]
+        for pkg_name, key_name in pkg_names.items():
+            version = pkgver.removeprefix(f"{pkg_name}-")
+            # Make sure that 'gcc' doesn't match 'gcc-foo-1.0-r0'.
+            if version != pkgver and version[:1].isdigit():
+                result[key_name] = version
+                break
+    missing_pkgs = [
+        pkg_name for pkg_name, key_name in pkg_names.items() if key_name not in result
+    ]
+    if missing_pkgs:
+        raise RuntimeError(
+            f"Command `{shlex.join(args)}` produced unexpected output! Expected "
+            "pkgver of " + ", ".join(f"'{name}'" for name in missing_pkgs) + " in "
+            f"the output.\n\n`{shlex.join(args)}` stdout:\n{proc.stdout}"
+        )
+    return result
+
+
 class AlpinePackageVersions(typing.NamedTuple):
     """Versions of build dependencies provided by Alpine Linux repositories.
 
@@ -68,40 +150,13 @@ class AlpinePackageVersions(typing.NamedTuple):
     def from_apk(cls: type[_AlpinePackageVersionsSelf]) -> _AlpinePackageVersionsSelf:
         """Get the currently installed versions of specified Apk packages.
 
-        This function works in apk-based Linux distros only.
+        This function works in apk-based Linux distros only. apk is executed only
+        once per process, the result is reused in subsequent calls.
         """
-        apk_exe = shutil.which("apk")
-        if apk_exe is None:
-            raise RuntimeError(
-                "Couldn't find 'apk' executable! Are you running this script outside "
-                "of Alpine Linux?"
-            )
-        result = {}
-        for key_name, pkg_name in (
-            ("meson", "meson"),
-            ("gcc", "gcc"),
-            ("cmake", "cmake"),
-            ("linux_headers", "linux-headers"),
-        ):
-            args = [apk_exe, "list", "--installed", pkg_name]
-            proc = subprocess.run(
-                args=args,
-                text=True,
-                capture_output=True,
-                check=True,
-            )
-            if not proc.stdout.startswith(f"{pkg_name}-"):
-                raise RuntimeError(
-                    f"Command `{shlex.join(args)}` produced unexpected output! "
-                    f"Expected pkgver of '{pkg_name}' on the first (and only) line of "
-                    f"output.\n\n`{shlex.join(args)}` stdout:\n{proc.stdout}"
-                )
-            result[key_name] = proc.stdout.split(maxsplit=1)[0].removeprefix(
-                f"{pkg_name}-"
-            )
-        return cls(**result)
+        return cls(**_get_apk_versions())
 
 
+@functools.cache
 def _get_alpine_release() -> str:
     """Get the currently running version of Alpine Linux."""
     with open("/etc/alpine-release") as input:
@@ -131,29 +186,10 @@ if __name__ == "__main__":
     depmf_wrap_dict = meson.depmf.get_subproject_data(args.meson_depmf_file)
 
     # Infer some info from the depmf.json file.
-    project_version = depmf_wrap_dict["android-tools-static"].version
+    project_version = meson.depmf.get_version(depmf_wrap_dict, "android-tools-static")
     uses_bundled_libusb = args.uses_bundled_libusb == "true"
 
-    assert project_version is not None
-
-    match args.color:
-        case "always":
-            color = True
-        case "never":
-            color = False
-        case "auto":
-            # https://no-color.org/
-            if "NO_COLOR" in os.environ and len(os.environ["NO_COLOR"]) != 0:
-                color = False
-            else:
-                color = sys.stderr.isatty()
-        case _:
-            sys.exit(
-                f"Unknown color value '{args.color}'! This is likely a bug in the "
-                "script"
-            )
-
-    if color:
+    if args.color:
         warnings.formatwarning = base.ansi_warning_format
 
     target = base.Target(args.target_architecture, base.TargetOS.LINUX)
@@ -161,7 +197,7 @@ if __name__ == "__main__":
     #
     # Look for git.
     #
-    git_path = shutil.which("git")
+    git_path = base.find_git()
     if git_path is None:
         sys.exit("Couldn't find 'git' executable! Cannot proceed with SBOM generation.")
 
@@ -179,6 +215,12 @@ if __name__ == "__main__":
     )
 
     wraps = meson.wrap_info.get_wraps_info(depmf_wrap_dict, source_dir, target)
+    nmeum_patch_list = high_level.document.read_patch_series(
+        args.nmeum_patch_series_file, source_dir
+    )
+    added_patch_list = high_level.document.read_patch_series(
+        args.added_patch_series_file, source_dir
+    )
 
     #
     # Assemble the input into processed components shared across all SBOM entrypoint
@@ -206,8 +248,8 @@ if __name__ == "__main__":
         args.github_runner_name_ver,
         args.softprops_action_gh_release_version,
         args.base_repolink,
-        args.nmeum_patch_series_file,
-        args.added_patch_series_file,
+        nmeum_patch_list,
+        added_patch_list,
         submodule_info,
         wraps,
         depmf_wrap_dict,
@@ -221,18 +263,21 @@ if __name__ == "__main__":
 
     apk_versions = AlpinePackageVersions.from_apk()
 
-    for purl, ver in (
-        (PurlNames.alpine, alpine_version),
-        (PurlNames.alpine_meson, apk_versions.meson),
-        (PurlNames.alpine_gcc, apk_versions.gcc),
-        # It is assumed that the version of gcc and g++ is identical.
-        (PurlNames.alpine_gpp, apk_versions.gcc),
-        (PurlNames.alpine_cmake, apk_versions.cmake),
-        (PurlNames.alpine_linux_headers, apk_versions.linux_headers),
-        (PurlNames.setup_alpine, args.setup_alpine_version),
-    ):
-        purldb[purl] = proj_types.Purl(f"{purl}@{ver}")
-        pass
+    purldb.update(
+        {
+            purl: proj_types.Purl(purl + "@" + ver)
+            for purl, ver in (
+                (PurlNames.alpine, alpine_version),
+                (PurlNames.alpine_meson, apk_versions.meson),
+                (PurlNames.alpine_gcc, apk_versions.gcc),
+                # It is assumed that the version of gcc and g++ is identical.
+                (PurlNames.alpine_gpp, apk_versions.gcc),
+                (PurlNames.alpine_cmake, apk_versions.cmake),
+                (PurlNames.alpine_linux_headers, apk_versions.linux_headers),
+                (PurlNames.setup_alpine, args.setup_alpine_version),
+            )
+        }
+    )
 
     alpine_supplier = ComponentSupplier(
         name="Alpine Linux official repository", url="https://www.alpinelinux.org/"
@@ -261,115 +306,77 @@ if __name__ == "__main__":
         "https://github.com/jirutka/setup-alpine/blob/master/LICENSE",
     )
 
-    linux_components = [
-        cyclonedx.generic_component.generate(
-            name="Alpine Linux",
-            version=alpine_version,
-            c_type=ComponentType.operating_system,
-            ref=purldb[PurlNames.alpine],
-            description=(
-                "Stable version of Alpine Linux used to build android-tools-static"
+    document["components"].extend(
+        (
+            cyclonedx.generic_component.generate(
+                name="Alpine Linux",
+                version=alpine_version,
+                c_type=ComponentType.operating_system,
+                ref=purldb[PurlNames.alpine],
+                description=(
+                    "Stable version of Alpine Linux used to build android-tools-static"
+                ),
             ),
-        ),
-        cyclonedx.generic_component.generate(
-            name="Meson",
-            version=apk_versions.meson,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_meson],
-            description="Meson build system",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"meson-{apk_versions.meson}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="GCC",
-            version=apk_versions.gcc,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_gcc],
-            description="GNU Compiler Collection",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"gcc-{apk_versions.gcc}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="G++",
-            version=apk_versions.gcc,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_gpp],
-            description="GNU Compiler Collection - C++ compiler",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"g++-{apk_versions.gcc}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="CMake",
-            version=apk_versions.cmake,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.alpine_cmake],
-            description="CMake build system",
-            supplier=alpine_supplier,
-            properties={"alpine_pkg_name": f"cmake-{apk_versions.cmake}"},
-        ),
-        cyclonedx.generic_component.generate(
-            name="linux-headers",
-            version=apk_versions.linux_headers,
-            c_type=ComponentType.library,
-            ref=purldb[PurlNames.alpine_linux_headers],
-            description="Linux kernel headers",
-            supplier=alpine_supplier,
-            properties={
-                "alpine_pkg_name": f"linux-headers-{apk_versions.linux_headers}"
-            },
-        ),
-        setup_alpine,
-    ]
+            cyclonedx.generic_component.generate(
+                name="Meson",
+                version=apk_versions.meson,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_meson],
+                description="Meson build system",
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"meson-{apk_versions.meson}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="GCC",
+                version=apk_versions.gcc,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_gcc],
+                description="GNU Compiler Collection",
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"gcc-{apk_versions.gcc}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="G++",
+                version=apk_versions.gcc,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_gpp],
+                description="GNU Compiler Collection - C++ compiler",
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"g++-{apk_versions.gcc}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="CMake",
+                version=apk_versions.cmake,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.alpine_cmake],
+                description="CMake build system",
+                supplier=alpine_supplier,
+                properties={"alpine_pkg_name": f"cmake-{apk_versions.cmake}"},
+            ),
+            cyclonedx.generic_component.generate(
+                name="linux-headers",
+                version=apk_versions.linux_headers,
+                c_type=ComponentType.library,
+                ref=purldb[PurlNames.alpine_linux_headers],
+                description="Linux kernel headers",
+                supplier=alpine_supplier,
+                properties={
+                    "alpine_pkg_name": f"linux-headers-{apk_versions.linux_headers}"
+                },
+            ),
+            setup_alpine,
+        )
+    )
 
-    document["components"].extend(linux_components)
+    libusb_purl = PurlNames.libusb if uses_bundled_libusb else PurlNames.wrap_libusb
 
     document["dependencies"] = [
         {
             "ref": purldb[PurlNames.android_tools_static],
             "dependsOn": [
-                purldb[PurlNames.github_runner],
-                purldb[PurlNames.action_gh_release],
-                purldb[PurlNames.ags_core],
-                purldb[PurlNames.ags_extras],
-                purldb[PurlNames.ags_selinux],
-                # purldb[PurlNames.ags_f2fs_tools]
-                # purldb[PurlNames.ags_e2fsprogs]
-                purldb[PurlNames.boringssl],
-                purldb[PurlNames.ags_mkbootimg],
-                purldb[PurlNames.ags_avb],
-                purldb[PurlNames.ags_libbase],
-                purldb[PurlNames.ags_libziparchive],
-                purldb[PurlNames.ags_adb],
-                purldb[PurlNames.ags_logging],
-                # purldb[PurlNames.ags_libufdt]
-                purldb[PurlNames.wrap_fmt],
-                purldb[PurlNames.wrap_zlib],
-                purldb[PurlNames.wrap_google_brotli],
-                purldb[PurlNames.wrap_lz4],
-                purldb[PurlNames.wrap_zstd],
-                purldb[PurlNames.wrap_gtest],
-                purldb[PurlNames.wrap_abseil_cpp],
-                purldb[PurlNames.wrap_protobuf],
-                purldb[PurlNames.wrap_pcre2],
-                purldb[PurlNames.alpine],
-                purldb[PurlNames.alpine_meson],
-                purldb[PurlNames.alpine_gcc],
-                purldb[PurlNames.alpine_gpp],
-                purldb[PurlNames.alpine_cmake],
-                purldb[PurlNames.alpine_linux_headers],
-                purldb[PurlNames.setup_alpine],
+                purldb[purl] for purl in (*_ALPINE_DEPENDS_KEYS, libusb_purl)
             ],
         }
     ]
 
-    dependsOn = document["dependencies"][0]["dependsOn"]  # noqa: N816
-
-    if uses_bundled_libusb:
-        dependsOn.append(purldb[PurlNames.libusb])
-    else:
-        dependsOn.append(purldb[PurlNames.wrap_libusb])
-
-    try:
-        json.dump(document, sys.stdout)
-    except OSError as exc:
-        sys.exit(str(exc))
+    base.write_output(base.encode_document(document))
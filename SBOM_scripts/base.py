@@ -18,16 +18,26 @@
 
 import datetime
 import enum
+import functools
+import json
+import os
+import shutil
 import sys
+import typing
 import warnings
 
 # enum.StrEnum requires 3.11
-if sys.version_info[0] != 3 or sys.version_info[1] < 11:
+if sys.version_info < (3, 11):
     sys.exit("This script requires Python version >=3.11")
 
 
-def _generate_timestamp() -> str:
-    return datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds")
+_now = datetime.datetime.now
+_UTC = datetime.UTC
+
+
+def generate_timestamp() -> str:
+    """Get the current time as an ISO 8601 timestamp usable in CycloneDX."""
+    return _now(_UTC).isoformat(timespec="seconds")
 
 
 class TargetOS(enum.StrEnum):
@@ -55,6 +65,101 @@ def ansi_warning_format(message, category, filename, lineno, line=None) -> str:
     return f"{filename}:{lineno}: \033[1;33m{category.__name__}\033[0m: {message}\n"
 
 
+@functools.cache
+def find_git() -> str | None:
+    """Find the git executable.
+
+    The GIT_EXE environment variable takes precedence over searching PATH. The result is
+    exported to GIT_EXE, so processes spawned by this script don't have to look for it
+    again.
+
+    Returns:
+        Path to git or None if it can't be found.
+    """
+    git_exe = os.environ.get("GIT_EXE") or shutil.which("git")
+    if git_exe is not None:
+        os.environ["GIT_EXE"] = git_exe
+    return git_exe
+
+
+def encode_document(document: dict[str, typing.Any]) -> bytes:
+    """Serialize a SBOM document into its final form.
+
+    The document is encoded as compact UTF-8 JSON terminated by a newline. Keys are
+    sorted, so the output doesn't depend on the order in which the document was
+    assembled.
+    """
+    # The document is a tree, circular reference checking is unnecessary.
+    return (
+        json.dumps(
+            document,
+            ensure_ascii=False,
+            check_circular=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+        + "\n"
+    ).encode()
+
+
+def write_output(output: bytes) -> None:
+    """Write a serialized SBOM document to stdout.
+
+    The whole document is handed to the binary stdout buffer at once. This prevents it
+    from being written in many small pieces when stdout is unbuffered or line buffered.
+    """
+    try:
+        sys.stdout.buffer.write(output)
+        sys.stdout.buffer.flush()
+    except OSError as exc:
+        sys.exit(str(exc))
+
+
+# CPU families recognized by Meson.
+# https://mesonbuild.com/Reference-tables.html#cpu-families
+_MESON_CPU_FAMILIES = frozenset(
+    (
+        "aarch64",
+        "alpha",
+        "arc",
+        "arm",
+        "avr",
+        "c2000",
+        "c6000",
+        "csky",
+        "dspic",
+        "e2k",
+        "ft32",
+        "ia64",
+        "loongarch64",
+        "m68k",
+        "microblaze",
+        "mips",
+        "mips64",
+        "msp430",
+        "parisc",
+        "pic24",
+        "ppc",
+        "ppc64",
+        "riscv32",
+        "riscv64",
+        "rl78",
+        "rx",
+        "s390",
+        "s390x",
+        "sh4",
+        "sparc",
+        "sparc64",
+        "sw_64",
+        "wasm32",
+        "wasm64",
+        "x86",
+        "x86_64",
+        "tricore",
+    )
+)
+
+
 class Target:
     """Helper class documenting target (or host machine in Meson's terms) system."""
 
@@ -68,48 +173,10 @@ class Target:
             architecture: One of CPU families recognized by Meson
               (https://mesonbuild.com/Reference-tables.html#cpu-families). A warning is
               issued when the argument is not in the table (or if the internal copy
-              of the table contained in this function is outdated).
+              of the table contained in this module is outdated).
             operating_system: Target operating system.
         """
-        if architecture not in (
-            "aarch64",
-            "alpha",
-            "arc",
-            "arm",
-            "avr",
-            "c2000",
-            "c6000",
-            "csky",
-            "dspic",
-            "e2k",
-            "ft32",
-            "ia64",
-            "loongarch64",
-            "m68k",
-            "microblaze",
-            "mips",
-            "mips64",
-            "msp430",
-            "parisc",
-            "pic24",
-            "ppc",
-            "ppc64",
-            "riscv32",
-            "riscv64",
-            "rl78",
-            "rx",
-            "s390",
-            "s390x",
-            "sh4",
-            "sparc",
-            "sparc64",
-            "sw_64",
-            "wasm32",
-            "wasm64",
-            "x86",
-            "x86_64",
-            "tricore",
-        ):
+        if architecture not in _MESON_CPU_FAMILIES:
             warnings.warn(
                 (
                     f"Architecture '{architecture}' is not one of the recognized "
@@ -119,21 +186,6 @@ class Target:
             )
         self._architecture = architecture
         self._operating_system = operating_system
-        # used in props()
-        self._props = [
-            {
-                "name": "target.architecture",
-                "value": self._architecture,
-            },
-            {
-                "name": "target.endian",
-                "value": "little",
-            },
-            {
-                "name": "target.os",
-                "value": str(self._operating_system),
-            },
-        ]
 
     def __repr__(self) -> str:  # noqa: D105
         return (
@@ -157,13 +209,27 @@ class Target:
         """Get target/host machine OS."""
         return self._operating_system
 
-    def props(self) -> list[dict[str, str]]:
+    @functools.cached_property
+    def props(self) -> tuple[dict[str, str], ...]:
         """Get "standard" CycloneDX property pairs.
 
-        The return value of this function can be appended to the "properties" key of a
-        CycloneDX component to mark its target properties.
+        The value of this property can be used as the "properties" key of a CycloneDX
+        component to mark its target properties. It is computed only once.
 
         The non-standard "target.architecture", "target.endian" and "target.os" keys
         are used. The same keys are also used in AdbWinApi.
         """
-        return self._props
+        return (
+            {
+                "name": "target.architecture",
+                "value": self._architecture,
+            },
+            {
+                "name": "target.endian",
+                "value": "little",
+            },
+            {
+                "name": "target.os",
+                "value": self._operating_system.value,
+            },
+        )
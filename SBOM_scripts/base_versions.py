@@ -16,7 +16,6 @@
 
 """Module for handling base_versions.ini."""
 
-import configparser
 import typing
 from pathlib import Path
 
@@ -34,9 +33,21 @@ def get_base_versions(source_dir: Path) -> BaseVersions:
     Arguments:
         source_dir: Path to the source directory.
     """
-    config = configparser.ConfigParser()
-    config.read(source_dir / "base_versions.ini")
+    # base_versions.ini is simple enough that it doesn't need configparser. Only
+    # comments, section headers and single line key = value pairs are supported.
+    values = {}
+    section = None
+    for line in (source_dir / "base_versions.ini").read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1].strip()
+        elif section == "base_versions" and "=" in line:
+            key, value = line.split("=", maxsplit=1)
+            values[key.strip()] = value.strip()
+
     return BaseVersions(
-        nmeum_version=config["base_versions"]["nmeum_version"],
-        msys2_version=config["base_versions"]["msys2_version"],
+        nmeum_version=values["nmeum_version"],
+        msys2_version=values["msys2_version"],
     )
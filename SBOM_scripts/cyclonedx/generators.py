@@ -16,7 +16,7 @@
 
 # https://cyclonedx.org/docs/1.6/json/
 
-import datetime
+import base64
 import enum
 import typing
 import uuid
@@ -29,10 +29,6 @@ from purldb.keys import PurlDB, PurlNames
 from . import util
 
 
-def _generate_timestamp() -> str:
-    return datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds")
-
-
 class Lifecycles(enum.StrEnum):
     """CycloneDX lifecycles."""
 
@@ -45,17 +41,28 @@ class Lifecycles(enum.StrEnum):
     decommission = "decommission"
 
 
-def get_template(lifecycle: Lifecycles) -> dict[str, typing.Any]:
-    """Get the basic CycloneDX 1.6 template."""
+def get_template(
+    lifecycle: Lifecycles, timestamp: str | None = None, serial: str | None = None
+) -> dict[str, typing.Any]:
+    """Get the basic CycloneDX 1.6 template.
+
+    Arguments:
+        lifecycle: Lifecycle phase of the SBOM.
+        timestamp: Timestamp of the SBOM. The current time is used if it is None.
+        serial: Serial number of the SBOM in the 'urn:uuid:<UUID>' format. A random
+          one is generated if it is None.
+    """
     return {
         "$schema": "https://cyclonedx.org/schema/bom-1.6.schema.json",
         "bomFormat": "CycloneDX",
         "specVersion": "1.6",
-        "serialNumber": uuid.uuid4().urn,
+        "serialNumber": serial if serial is not None else uuid.uuid4().urn,
         "version": 1,
         "metadata": {
-            "timestamp": _generate_timestamp(),
-            "lifecycles": [{"phase": str(lifecycle)}],
+            "timestamp": (
+                timestamp if timestamp is not None else base.generate_timestamp()
+            ),
+            "lifecycles": [{"phase": lifecycle.value}],
             "supplier": {
                 "name": "GitHub, Inc.",
                 "url": ["https://github.com/"],
@@ -194,7 +201,7 @@ def get_primary_component(
                 "ancestors": [nmeum_base, msys2_base],
                 "commits": added_commits,
             },
-            "properties": target.props(),
+            "properties": target.props,
         }
     )
     util.set_license(result, util.Licenses.APACHE)
@@ -274,17 +281,17 @@ def get_patch(
         repo_link: The repo link function.
         issue: Optional field describing the issue resolved by the diff.
     """
-    with patch_path.open() as input:
-        patch_content = input.read()
-
-    result = proj_types.CyclonePatch(
-        {
-            "type": str(type),
-            "diff": {
-                "text": {"content": patch_content},
-            },
+    result = proj_types.CyclonePatch({"type": type.value, "diff": {}})
+
+    patch_bytes = patch_path.read_bytes()
+    try:
+        result["diff"]["text"] = {"content": patch_bytes.decode()}
+    except UnicodeDecodeError:
+        # Patches modifying files in other encodings can't be embedded as text.
+        result["diff"]["text"] = {
+            "content": base64.b64encode(patch_bytes).decode("ascii"),
+            "encoding": "base64",
         }
-    )
 
     if issue is not None:
         if (issue.source_name, issue.source_url).count(None) == 1:
@@ -293,7 +300,7 @@ def get_patch(
             )
         result["resolves"] = [
             {
-                "type": str(issue.type),
+                "type": issue.type.value,
                 "name": issue.name,
                 "description": issue.description,
             }
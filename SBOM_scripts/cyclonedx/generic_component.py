@@ -114,7 +114,7 @@ class ReferenceHash(typing.NamedTuple):
 
 def generate_reference(type: ReferenceType, url: str) -> proj_types.CycloneReference:
     """Generate a CycloneDX reference."""
-    return proj_types.CycloneReference({"type": str(type), "url": url})
+    return proj_types.CycloneReference({"type": type.value, "url": url})
 
 
 def generate(
@@ -149,7 +149,7 @@ def generate(
           another component doesn't affect the dependency relation of the components.
     """
     result: dict[str, typing.Any] = {
-        "type": str(c_type),
+        "type": c_type.value,
         "name": name,
         "version": version,
         "bom-ref": ref,
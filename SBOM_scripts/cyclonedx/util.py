@@ -17,10 +17,13 @@
 # https://cyclonedx.org/docs/1.6/json/
 
 import enum
+import functools
 import re
 
 import proj_types
 
+_SHA_256_RE = re.compile(r"[a-f0-9]{64}")
+
 
 class Licenses(enum.Enum):
     """License types supported by set_license()."""
@@ -29,18 +32,12 @@ class Licenses(enum.Enum):
     MIT = enum.auto()
 
 
-def set_license(
-    component: proj_types.CycloneComponent,
-    license: Licenses,
-    override_license_url: str | None = None,
-) -> None:
-    """Set the license of the given component.
-
-    Arguments:
-        component: Component to modify in place.
-        license: The license to be set.
-        override_license_url: URL of the license to be used instead of a generic one.
-    """
+@functools.cache
+def _get_license_info(
+    license: Licenses, override_license_url: str | None
+) -> dict[str, str]:
+    # The returned dict is shared by all components with the same license, it must not
+    # be modified.
     match license:
         case Licenses.APACHE:
             spdx_id = "Apache-2.0"
@@ -58,14 +55,30 @@ def set_license(
             )
         case _:
             raise ValueError("Unknown license name specified!")
-    component["licenses"] = [{"license": {"id": spdx_id, "url": license_url}}]
+    return {"id": spdx_id, "url": license_url}
+
+
+def set_license(
+    component: proj_types.CycloneComponent,
+    license: Licenses,
+    override_license_url: str | None = None,
+) -> None:
+    """Set the license of the given component.
+
+    Arguments:
+        component: Component to modify in place.
+        license: The license to be set.
+        override_license_url: URL of the license to be used instead of a generic one.
+    """
+    license_info = _get_license_info(license, override_license_url)
+    component["licenses"] = [{"license": license_info}]
     if "externalReferences" in component and isinstance(
         component["externalReferences"], list
     ):
         externalReferences = component["externalReferences"]  # noqa: N806
     else:
         externalReferences = component["externalReferences"] = []  # noqa: N806
-    externalReferences.append({"type": "license", "url": license_url})
+    externalReferences.append({"type": "license", "url": license_info["url"]})
 
 
 class HashTypes(enum.StrEnum):
@@ -100,9 +113,9 @@ def set_hash(
     """
     match hash_type:
         case HashTypes.SHA_256:
-            assert re.fullmatch(r"[a-f0-9]{64}", hash) is not None
+            assert _SHA_256_RE.fullmatch(hash) is not None
         case _:
             raise RuntimeError(
                 "Got unexpected hash type. This is likely a bug in the script"
             )
-    component["hashes"] = [{"alg": str(hash_type), "content": hash}]
+    component["hashes"] = [{"alg": hash_type.value, "content": hash}]
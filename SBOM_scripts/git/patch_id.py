@@ -12,81 +12,240 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Module used to get the patch id of patch files and git commits."""
+"""Module used to get the patch id of patch files and git commits.
 
+Patch ids are computed in-process. The computation is equivalent to the one performed
+by `git patch-id --stable`.
+"""
+
+import enum
+import hashlib
+import io
+import re
 import subprocess
+import typing
 from pathlib import Path
 
 import proj_types
 
+# Patch ids are sums of SHA-1 hashes of the individual file diffs modulo 2^160.
+_PATCH_ID_MODULUS = 1 << 160
+# Characters considered whitespace by git's isspace().
+_WHITESPACE = b" \t\n\r"
+_OID_RE = re.compile(rb"[0-9a-fA-F]{40}")
+_HUNK_HEADER_RE = re.compile(rb"@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))?")
+
+
+class _LineAction(enum.Enum):
+    """What to do with a line of a patch."""
+
+    HASH = enum.auto()
+    SKIP = enum.auto()
+    END_PATCH = enum.auto()
+
+
+class _PatchIDState:
+    """State of a patch id computation.
+
+    This mirrors get_one_patchid() of git's builtin/patch-id.c in stable mode.
+    """
+
+    def __init__(self) -> None:
+        """Initialize _PatchIDState."""
+        self._hasher = hashlib.sha1()
+        self._result = 0
+        self.patch_len = 0
+        # Number of remaining lines of the current hunk in the old and the new file.
+        # -1 means that the diff header is being parsed.
+        self._before = -1
+        self._after = -1
+        self._diff_is_binary = False
+        self._pre_oid = b""
+        self._post_oid = b""
+
+    def _flush_hunk(self) -> None:
+        self._result = (
+            self._result + int.from_bytes(self._hasher.digest(), "little")
+        ) % _PATCH_ID_MODULUS
+        self._hasher = hashlib.sha1()
+
+    def _process_header_line(self, line: bytes) -> _LineAction:
+        if line.startswith((b"GIT binary patch", b"Binary files")):
+            self._diff_is_binary = True
+            self._before = 0
+            self._hasher.update(self._pre_oid)
+            self._hasher.update(self._post_oid)
+            self._flush_hunk()
+            return _LineAction.SKIP
+        elif line.startswith(b"index "):
+            pre, sep, post = line[6:].partition(b"..")
+            if sep:
+                self._pre_oid = pre
+                self._post_oid = post.split(b" ", 1)[0] if b" " in post else post[:-1]
+            return _LineAction.SKIP
+        elif line.startswith(b"--- "):
+            self._before = self._after = 1
+        elif not line[:1].isalpha():
+            return _LineAction.END_PATCH
+        return _LineAction.HASH
+
+    def _process_hunk_boundary(self, line: bytes) -> _LineAction:
+        if line.startswith(b"@@ -"):
+            # Line numbers are ignored, only line counts are used.
+            if (match := _HUNK_HEADER_RE.match(line)) is not None:
+                self._before = int(match[1]) if match[1] is not None else 1
+                self._after = int(match[2]) if match[2] is not None else 1
+            return _LineAction.SKIP
+        if not line.startswith(b"diff "):
+            return _LineAction.END_PATCH
+        # This is the header of the next file.
+        self._flush_hunk()
+        self._before = self._after = -1
+        return _LineAction.HASH
+
+    def process_line(self, line: bytes) -> _LineAction:
+        """Process a line of the patch (excluding the commit message).
+
+        Arguments:
+            line: The line including its trailing newline.
+        """
+        if self._before == -1:
+            action = self._process_header_line(line)
+            if action is not _LineAction.HASH:
+                return action
+
+        if self._diff_is_binary:
+            if line.startswith(b"diff "):
+                self._diff_is_binary = False
+                self._before = -1
+            return _LineAction.SKIP
+
+        if self._before == 0 and self._after == 0:
+            action = self._process_hunk_boundary(line)
+            if action is not _LineAction.HASH:
+                return action
+
+        # This line is inside a hunk.
+        if line[:1] in (b"-", b" "):
+            self._before -= 1
+        if line[:1] in (b"+", b" "):
+            self._after -= 1
+
+        stripped_line = line.translate(None, _WHITESPACE)
+        self.patch_len += len(stripped_line)
+        self._hasher.update(stripped_line)
+        return _LineAction.HASH
+
+    def get_patch_id(self) -> proj_types.PatchID:
+        """Finish the computation and return the patch id."""
+        self._flush_hunk()
+        return proj_types.PatchID(self._result.to_bytes(20, "little").hex())
+
+
+def _compute_patch_id(lines: typing.Iterable[bytes]) -> proj_types.PatchID:
+    """Compute the patch id of the first patch in lines.
+
+    Arguments:
+        lines: Lines of the patch including their trailing newlines. This can be
+          either a diff or a 'git format-patch'-like .patch file.
 
-def get_file_patch_id(patch_path: Path, git_exe: str) -> proj_types.PatchID:
+    Returns:
+        The patch id or an empty string if lines do not contain a patch (this matches
+        the behavior of `git patch-id`, which prints nothing in that case).
+    """
+    state = _PatchIDState()
+
+    for line in lines:
+        if line.startswith(b"commit "):
+            oid = line[7:]
+        elif line.startswith(b"From "):
+            oid = line[5:]
+        else:
+            # Skip "\ No newline at end of file".
+            if line.startswith(b"\\ ") and len(line) > 12:
+                continue
+            oid = line
+
+        # Lines starting with an object id mark the start of the next patch.
+        if _OID_RE.match(oid):
+            if state.patch_len:
+                break
+            continue
+
+        # Ignore the commit message.
+        if not state.patch_len and not line.startswith(b"diff "):
+            continue
+
+        if state.process_line(line) is _LineAction.END_PATCH:
+            break
+
+    if not state.patch_len:
+        return proj_types.PatchID("")
+    return state.get_patch_id()
+
+
+def get_file_patch_id(patch_path: Path) -> proj_types.PatchID:
     """Get the patch id of the specified patch file.
 
-    This uses `git patch-id --stable` under the hood.
+    This is equivalent to `git patch-id --stable`.
 
     Arguments:
         patch_path: Path to the patch whose patch id is computed.
-        git_exe: Path to the git executable.
     """
-    with patch_path.open() as input:
-        exec_proc = subprocess.run(
-            args=(git_exe, "patch-id", "--stable"),
-            stdin=input,
-            capture_output=True,
-            text=True,
-            check=True,
-            close_fds=True,
-        )
+    with patch_path.open("rb") as input:
+        return _compute_patch_id(input)
 
-    return proj_types.PatchID(exec_proc.stdout[:40])
 
+def get_head_commit_patch_ids(
+    repo_dir: Path, git_exe: str, count: int
+) -> list[proj_types.PatchID]:
+    """Get patch ids of the last count commits of the specified git repository.
 
-def get_nth_head_commit_patch_id(
-    repo_dir: Path, git_exe: str, n: int
-) -> proj_types.PatchID:
-    """Get HEAD~n th patch id from the specified git repository.
+    All commits are retrieved by a single git invocation.
 
     Arguments:
         repo_dir: Path to the examined repository.
         git_exe: Path to the git executable.
-        n: The HEAD~n commit is examined.
+        count: Number of examined commits.
+
+    Returns:
+        A list of patch ids. The first element is the patch id of HEAD, the second one
+        is the patch id of HEAD~1 and so on.
     """
-    git_diff_args = [git_exe, "diff", f"HEAD~{n}^!"]
-    git_diff_proc = subprocess.Popen(
-        args=git_diff_args,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
+    # Only the first parents are followed and merges are diffed against their first
+    # parent to match `git diff HEAD~n^!`. Signatures would end up in the parsed output.
+    git_log_args = [
+        git_exe,
+        "-c",
+        "log.showSignature=false",
+        "log",
+        "--first-parent",
+        "--diff-merges=first-parent",
+        "--patch",
+        "--no-color",
+        "--format=commit %H",
+        f"--max-count={count}",
+        "HEAD",
+    ]
+    git_log_proc = subprocess.run(
+        args=git_log_args,
+        capture_output=True,
+        check=True,
         close_fds=True,
         cwd=repo_dir,
     )
-    git_patch_id_args = [git_exe, "patch-id", "--stable"]
-    git_patch_id_proc = subprocess.Popen(
-        args=git_patch_id_args,
-        stdin=git_diff_proc.stdout,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        close_fds=True,
-    )
-
-    # Make mypy happy.
-    assert git_diff_proc.stdout is not None
-
-    git_diff_proc.stdout.close()
 
-    git_patch_id_stdout, git_patch_id_stderr = git_patch_id_proc.communicate()
-    git_diff_stderr = git_diff_proc.communicate()[1]
-
-    if git_diff_proc.returncode != 0:
-        raise subprocess.CalledProcessError(
-            git_diff_proc.returncode, git_diff_args, None, git_diff_stderr
-        )
-    if git_patch_id_proc.returncode != 0:
-        raise subprocess.CalledProcessError(
-            git_patch_id_proc.returncode,
-            git_patch_id_args,
-            git_patch_id_stdout,
-            git_patch_id_stderr,
+    commits: list[list[bytes]] = []
+    for line in io.BytesIO(git_log_proc.stdout):
+        if line.startswith(b"commit "):
+            commits.append([])
+        else:
+            commits[-1].append(line)
+
+    if len(commits) != count:
+        raise RuntimeError(
+            f"Expected at least {count} commits in '{repo_dir}', found only "
+            f"{len(commits)}!"
         )
 
-    return proj_types.PatchID(git_patch_id_stdout.decode()[:40])
+    return [_compute_patch_id(lines) for lines in commits]
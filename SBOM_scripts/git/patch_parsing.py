@@ -19,9 +19,9 @@
 In comparison to other modules in this package, git is not directly executed here.
 """
 
-import email
 import email.headerregistry
 import email.message
+import email.parser
 import email.policy
 import typing
 from pathlib import Path
@@ -44,7 +44,22 @@ def get_commit_patch_info(patch_path: Path) -> CommitPatchInfo:
     """
     with patch_path.open() as input:
         sha_line = input.readline()
-        email_msg = email.message_from_file(input, policy=email.policy.default)
+        # Only the headers are parsed as an e-mail message. The body is read up to the
+        # '---' separator, the diff after it isn't needed.
+        header_lines = []
+        for line in input:
+            if line == "\n":
+                break
+            header_lines.append(line)
+        email_msg = email.parser.HeaderParser(policy=email.policy.default).parsestr(
+            "".join(header_lines)
+        )
+        body_lines = []
+        for line in input:
+            line, separator, _ = line.partition("---")
+            body_lines.append(line)
+            if separator:
+                break
 
     addresses = email_msg["From"].addresses
 
@@ -52,8 +67,8 @@ def get_commit_patch_info(patch_path: Path) -> CommitPatchInfo:
     assert isinstance(addresses[0], email.headerregistry.Address)
 
     message_header = email_msg["Subject"].removeprefix("[PATCH] ")
-    assert not email_msg.is_multipart()
-    message_body = email_msg.get_payload().split("---", maxsplit=1)[0].strip()
+    assert email_msg.get_content_maintype() != "multipart"
+    message_body = "".join(body_lines).strip()
 
     if message_body:
         message = f"{message_header}\n\n{message_body}"
@@ -14,17 +14,23 @@
 
 """Module used to parse and return info about git submodules used."""
 
-import configparser
+import dataclasses
+import re
 import shlex
 import subprocess
-import typing
 import urllib.parse
 from pathlib import Path
 
 import base
 
+# Matches submodule entries of `git ls-tree -z --format=...` output used below.
+# Sample entry:
+# commitce9ea51f30f69f7560db692f7cb4d5d5502c3653adb
+_LS_TREE_COMMIT_RE = re.compile(rb"(?<![^\0])commit([0-9a-f]{40})([^\0]+)")
 
-class ModuleInfo(typing.NamedTuple):
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ModuleInfo:
     """Info about a git submodule."""
 
     pinned_hash: str
@@ -33,8 +39,9 @@ class ModuleInfo(typing.NamedTuple):
     url: str
 
 
-class SubmoduleInfo(typing.NamedTuple):
-    """Named tuple storing info about all git modules.
+@dataclasses.dataclass(frozen=True, slots=True)
+class SubmoduleInfo:
+    """Info about all git modules.
 
     boringssl is a Meson Wrap, but it is a git module in original nmeum/android-tools
     and the wrap retrieves it by hash, so storing it is still relevant.
@@ -67,6 +74,41 @@ class SubmoduleInfo(typing.NamedTuple):
     libufdt: None = None
 
 
+def _read_gitmodules(gitmodules_path: Path) -> dict[str, dict[str, str]]:
+    # .gitmodules is simple enough that it doesn't need configparser. Only comments,
+    # section headers and single line key = value pairs are supported.
+    sections: dict[str, dict[str, str]] = {}
+    section: dict[str, str] | None = None
+    for line in gitmodules_path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = sections.setdefault(line[1:-1].strip(), {})
+        elif section is not None and "=" in line:
+            key, value = line.split("=", maxsplit=1)
+            # Keys are case insensitive.
+            section[key.strip().lower()] = value.strip()
+    return sections
+
+
+def _split_url(url: str) -> tuple[str, str]:
+    # Split URL to 'scheme://hostname' and path without the leading slash.
+    scheme, separator, rest = url.partition("://")
+    hostname, _, path = rest.partition("/")
+    # Simple URLs (which all submodule URLs are in practice) don't need a full URL
+    # parser.
+    if separator and hostname and not any(char in url for char in "@[?#"):
+        hostname = hostname.partition(":")[0]
+    else:
+        processed_url = urllib.parse.urlsplit(url)
+        assert processed_url.hostname is not None
+        scheme = processed_url.scheme
+        hostname = processed_url.hostname
+        path = processed_url.path.removeprefix("/")
+    return scheme.lower() + "://" + hostname.lower(), path
+
+
 def read_submodule_info(
     source_dir: Path, git_exe: str, use_bundled_libusb: bool, target: base.Target
 ) -> SubmoduleInfo:
@@ -86,44 +128,31 @@ def read_submodule_info(
         "-z",
         "--format=%(objecttype)%(objectname)%(path)",
     ]
-    proc = subprocess.run(
-        args=args, capture_output=True, text=True, cwd=source_dir / "vendor"
-    )
+    proc = subprocess.run(args=args, capture_output=True, cwd=source_dir / "vendor")
     if proc.returncode != 0:
         raise RuntimeError(
             f"`{shlex.join(args)}` exited with exit status {proc.returncode}!\n\n"
-            f"stderr:\n{proc.stderr}"
+            f"stderr:\n{proc.stderr.decode(errors='replace')}"
         )
-    file_lines = proc.stdout.split("\0")
-
-    hashes = {}
 
-    for line in file_lines:
-        if not line.startswith("commit"):
-            continue
-        # Sample line:
-        # commitce9ea51f30f69f7560db692f7cb4d5d5502c3653adb
-        hashes[line[46:]] = line[6:46]
+    hashes = {
+        match[2].decode(): match[1].decode()
+        for match in _LS_TREE_COMMIT_RE.finditer(proc.stdout)
+    }
 
-    gitmodules = configparser.ConfigParser()
-    gitmodules.read(source_dir / ".gitmodules")
+    gitmodules = _read_gitmodules(source_dir / ".gitmodules")
 
     result = {}
 
-    for section_name, section in gitmodules.items():
-        if section_name == configparser.DEFAULTSECT:
-            continue
+    for section in gitmodules.values():
         submodule_path = Path(section["path"])
         submodule_name = submodule_path.name
         submodule_url = section["url"]
-        submodule_processed_url = urllib.parse.urlsplit(submodule_url)
-        assert submodule_processed_url.hostname is not None
+        base_repository, repository_name = _split_url(submodule_url)
         result[submodule_name] = ModuleInfo(
             pinned_hash=hashes[submodule_name],
-            name=submodule_processed_url.path.removeprefix("/"),
-            base_repository=submodule_processed_url.scheme
-            + "://"
-            + submodule_processed_url.hostname,
+            name=repository_name,
+            base_repository=base_repository,
             url=submodule_url,
         )
 
@@ -82,11 +82,14 @@ def verify_checkout_patches(
         PatchIDError: If the checkout doesn't contain one or more of the patches
           specified.
     """
-    for patch_num, patch in enumerate(patch_series):
-        commit_patch_id = patch_id.get_nth_head_commit_patch_id(
-            repo_path, git_exe, patch_num
-        )
-        patch_patch_id = patch_id.get_file_patch_id(patch, git_exe)
+    patch_list = list(patch_series)
+
+    commit_patch_ids = patch_id.get_head_commit_patch_ids(
+        repo_path, git_exe, len(patch_list)
+    )
+
+    for commit_patch_id, patch in zip(commit_patch_ids, patch_list, strict=True):
+        patch_patch_id = patch_id.get_file_patch_id(patch)
 
         if commit_patch_id != patch_patch_id:
             raise PatchIDError(commit_patch_id, patch_patch_id, repo_path, patch)
@@ -14,13 +14,17 @@
 
 """Utility functions interacting with git."""
 
+import functools
 import subprocess
 from pathlib import Path
 
 
+@functools.cache
 def get_head(git_exe: str, repo_dir: Path) -> str:
     """Get the commit hash of HEAD.
 
+    The result is cached, HEAD isn't expected to move while the SBOM is generated.
+
     Arguments:
         git_exe: Path to the git executable.
         repo_dir: Path to the repository.
@@ -34,3 +38,52 @@ def get_head(git_exe: str, repo_dir: Path) -> str:
         check=True,
     )
     return proc.stdout.strip()
+
+
+def get_worktree_diff(git_exe: str, repo_dir: Path) -> bytes:
+    """Get the diff between HEAD and the working tree of tracked files.
+
+    Unlike 'git status', the diff reflects the contents of the modifications, so any
+    further edit of an already modified file changes it. Modified submodules are
+    included as 'Subproject commit' lines with the commit they are checked out at.
+    Untracked files are ignored.
+
+    Arguments:
+        git_exe: Path to the git executable.
+        repo_dir: Path to the repository.
+    """
+    proc = subprocess.run(
+        args=[
+            git_exe,
+            "diff",
+            "HEAD",
+            "--binary",
+            "--no-ext-diff",
+            "--no-textconv",
+            "--ignore-submodules=none",
+            "--submodule=short",
+        ],
+        capture_output=True,
+        cwd=repo_dir,
+        close_fds=True,
+        check=True,
+    )
+    return proc.stdout
+
+
+def get_submodule_heads(git_exe: str, repo_dir: Path) -> str:
+    """Get the commits all submodules (including nested ones) are checked out at.
+
+    Arguments:
+        git_exe: Path to the git executable.
+        repo_dir: Path to the repository.
+    """
+    proc = subprocess.run(
+        args=[git_exe, "submodule", "status", "--recursive"],
+        capture_output=True,
+        text=True,
+        cwd=repo_dir,
+        close_fds=True,
+        check=True,
+    )
+    return proc.stdout
@@ -16,6 +16,8 @@
 
 """Module used to generate the common part of the SBOM document."""
 
+import concurrent.futures
+import os
 import string
 import sys
 import typing
@@ -40,6 +42,22 @@ from purldb.keys import PurlDB, PurlNames
 
 from . import github_runner
 
+# Fields of git.submodule_parsing.SubmoduleInfo and their purls in the order in which
+# they appear in the SBOM. Fields which are None are skipped.
+_SUBMODULE_PURLS = (
+    ("core", PurlNames.ags_core),
+    ("extras", PurlNames.ags_extras),
+    ("boringssl", PurlNames.boringssl),
+    ("mkbootimg", PurlNames.ags_mkbootimg),
+    ("avb", PurlNames.ags_avb),
+    ("libbase", PurlNames.ags_libbase),
+    ("libziparchive", PurlNames.ags_libziparchive),
+    ("adb", PurlNames.ags_adb),
+    ("logging", PurlNames.ags_logging),
+    ("selinux", PurlNames.ags_selinux),
+    ("libusb", PurlNames.libusb),
+)
+
 
 def handle_repolink(
     repolink_format: str,
@@ -65,35 +83,30 @@ def handle_repolink(
     if "path" not in repolink_template.get_identifiers():
         sys.exit("The repolink_format argument must contain a ${path} substitution!")
 
-    get_file_link: proj_types.RepoLink
-
     # Facilitate a flexible mechanism for making repo links to files.
     # This mechanism does not hardcode the repository name or owner.
     # It optionaly supports ref substitution, which will include the commit SHA/tag
     # in the link making it permanent.
     if "ref" in repolink_template.get_identifiers():
         if repolink_ref is not None:
-
-            def get_file_link(path: str) -> str:
-                return repolink_template.substitute(path=path, ref=repolink_ref)
-
+            ref = repolink_ref
+        elif git_exe is not None:
+            ref = git.util.get_head(git_exe, source_dir)
         else:
-            if (
-                git_exe is None
-                or (hash := git.util.get_head(git_exe, source_dir)) is None
-            ):
-                get_file_link = None
-            else:
-
-                # This is used as a more advanced and easy to read lambda, no need to
-                # docstring it for D103.
-                def get_file_link(path: str) -> str:
-                    return repolink_template.substitute(path=path, ref=hash)
-
+            return None
     else:
+        ref = None
+
+    # The template is substituted only once. The path is filled in by a plain string
+    # replacement of a placeholder. NUL can't be a part of a command line argument, so
+    # it can't collide with the rest of the template.
+    file_link_template = repolink_template.substitute(path="\0", ref=ref)
 
-        def get_file_link(path: str) -> str:
-            return repolink_template.substitute(path=path)
+    # This is used as a more advanced and easy to read lambda, no need to docstring it
+    # for D103. The template is bound as a default argument to make it a local
+    # variable of the function.
+    def get_file_link(path: str, _template: str = file_link_template) -> str:
+        return _template.replace("\0", path)
 
     return get_file_link
 
@@ -113,6 +126,64 @@ class _EnhancementPatchIssueInfo(_BasePatchIssueInfo):
     pass
 
 
+_NOINSTALL_PATCH_INFO = _EnhancementPatchIssueInfo(
+    "installation process",
+    "Prevent the Wrap from installing its libraries and pkg-config files, since "
+    "they are not needed.",
+    None,
+    None,
+)
+
+# Info about patches applied to Meson Wraps. Keys are relative to
+# subprojects/packagefiles.
+_KNOWN_WRAP_PATCHES: dict[str, _DefectPatchIssueInfo | _EnhancementPatchIssueInfo] = {
+    "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch": (
+        _DefectPatchIssueInfo(
+            "cross build",
+            "Make abseil-cpp usable when both its cross and its native versions are "
+            "needed.",
+            "WrapDB GitHub Issues",
+            "https://github.com/mesonbuild/wrapdb/issues/1856",
+        )
+    ),
+    "abseil-cpp/0002-do-not-bother-building-unused-native-libs.patch": (
+        _EnhancementPatchIssueInfo(
+            "optimization",
+            "(Patch modifying "
+            "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch) Build "
+            "only needed libraries twice during cross compilation.",
+            None,
+            None,
+        )
+    ),
+    "fmt/noinstall.patch": _NOINSTALL_PATCH_INFO,
+    "libusb/noinstall.patch": _NOINSTALL_PATCH_INFO,
+    "lz4/noinstall.patch": _NOINSTALL_PATCH_INFO,
+    "pcre2/noinstall.patch": _NOINSTALL_PATCH_INFO,
+    "protobuf/0001-fix-host-abseil-compilation.patch": _EnhancementPatchIssueInfo(
+        "cross build",
+        "Adapt protobuf's build system to changes in "
+        "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch which "
+        "improves cross compilation",
+        "WrapDB GitHub Issues",
+        "https://github.com/mesonbuild/wrapdb/issues/1856",
+    ),
+    "protobuf/0002-do-not-build-nonnative-protoc-during-cross-build.patch": (
+        _EnhancementPatchIssueInfo(
+            "optimization", "Do not build non-native (host machine) protoc", None, None
+        )
+    ),
+    "protobuf/0004-fix-gcc-15-release-compilation.patch": _DefectPatchIssueInfo(
+        "build",
+        "Fixe protobuf compilation on MSYS2 in release mode.",
+        "protobuf GitHub Issues",
+        "https://github.com/protocolbuffers/protobuf/issues/21333",
+    ),
+    "zlib/noinstall.patch": _NOINSTALL_PATCH_INFO,
+    "zstd/noinstall.patch": _NOINSTALL_PATCH_INFO,
+}
+
+
 def _process_known_patches(
     input: dict[str, _DefectPatchIssueInfo | _EnhancementPatchIssueInfo],
     source_dir: Path,
@@ -126,16 +197,12 @@ def _process_known_patches(
 def _get_wrap_component(
     wrap_name: str,
     wrap_info: meson.wrap_info.MesonWrapInfo,
+    raw_patch_list: list[Path],
     known_patches: dict[Path, _DefectPatchIssueInfo | _EnhancementPatchIssueInfo],
     source_dir: Path,
-    git_exe: str,
     purldb: PurlDB,
     repo_link: proj_types.RepoLink,
 ) -> proj_types.CycloneComponent:
-    raw_patch_list = meson.wrap_patches.get_wrap_patch_list(
-        source_dir, wrap_name, meson.wrap_patches.PatchStrategy.GIT, git_exe
-    )
-
     IssueType = cyclonedx.generators.IssueType  # noqa: N806
     Issue = cyclonedx.generators.Issue  # noqa: N806
 
@@ -196,6 +263,32 @@ def _get_wrap_component(
     )
 
 
+def read_patch_series(
+    patch_series_file: Path, source_dir: Path
+) -> dict[str, list[Path]]:
+    """Read a NUL-separated patch series file.
+
+    Arguments:
+        patch_series_file: Path to the patch series file. It contains paths relative to
+          the patches/ directory separated by NUL.
+        source_dir: Path to the root source directory.
+
+    Returns:
+        Absolute paths of the patches grouped by the name of the submodule they apply
+        to. The order of the patches in the series is preserved.
+    """
+    result: dict[str, list[Path]] = {}
+    with open(patch_series_file, "rb") as file:
+        raw_patch_paths = file.read().split(b"\0")
+    # Empty items (caused by a trailing NUL) are skipped.
+    for raw_patch_path in filter(None, raw_patch_paths):
+        relative_path = Path(os.fsdecode(raw_patch_path))
+        result.setdefault(relative_path.parts[0], []).append(
+            source_dir / "patches" / relative_path
+        )
+    return result
+
+
 def get_base_document(
     source_dir: Path,
     purldb: PurlDB,
@@ -207,8 +300,8 @@ def get_base_document(
     github_runner_name_ver: str,
     action_gh_release_version: str,
     base_repolink: str,
-    nmeum_patch_series_file: Path,
-    added_patch_series_file: Path,
+    nmeum_patch_list: dict[str, list[Path]],
+    orig_patch_list: dict[str, list[Path]],
     submodules: git.submodule_parsing.SubmoduleInfo,
     wraps: dict[str, meson.wrap_info.MesonWrapInfo],
     meson_depmf: dict[str, meson.depmf.SubprojectInfo],
@@ -221,41 +314,31 @@ def get_base_document(
     top of what this function returns.
 
     There are too many arguments to document. Their purpose should hopefully be
-    self-explanatory.
+    self-explanatory. nmeum_patch_list and orig_patch_list should be read with
+    read_patch_series().
     """
-    project_version = meson_depmf["android-tools-static"].version
-
-    assert project_version is not None
-
-    nmeum_patch_list: dict[str, list[Path]] = {}
-    orig_patch_list: dict[str, list[Path]] = {}
-
-    for result_patch_dict, patch_list_path in (
-        (nmeum_patch_list, nmeum_patch_series_file),
-        (orig_patch_list, added_patch_series_file),
-    ):
-        with open(patch_list_path) as file:
-            for raw_patch_path in file.read().split("\0"):
-                relative_path = Path(raw_patch_path)
-                result_patch_dict.setdefault(relative_path.parts[0], []).append(
-                    source_dir / "patches" / relative_path
-                )
-
-    merged_patch_list = nmeum_patch_list.copy()
-    for submodule_name, patch_list in orig_patch_list.items():
-        # Be careful about shallow copies unintentionally writing into nmeum_patch_list
-        # here.
-        if submodule_name in merged_patch_list:
-            merged_patch_list[submodule_name] = (
-                merged_patch_list[submodule_name] + patch_list
+    project_version = meson.depmf.get_version(meson_depmf, "android-tools-static")
+
+    # The merged lists are new lists, so nmeum_patch_list and orig_patch_list are left
+    # untouched.
+    merged_patch_list: dict[str, list[Path]] = {}
+    for patch_dict in (nmeum_patch_list, orig_patch_list):
+        for submodule_name, patch_list in patch_dict.items():
+            merged_patch_list.setdefault(submodule_name, []).extend(patch_list)
+
+    # Submodules are verified concurrently, most of the time is spent waiting for git.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        verifications = [
+            executor.submit(
+                git.submodule_verification.verify_checkout_patches,
+                git_exe,
+                source_dir / "vendor" / submodule_name,
+                reversed(patch_list),
             )
-        else:
-            merged_patch_list[submodule_name] = patch_list
-
-    for submodule_name, patch_list in merged_patch_list.items():
-        git.submodule_verification.verify_checkout_patches(
-            git_exe, source_dir / "vendor" / submodule_name, reversed(patch_list)
-        )
+            for submodule_name, patch_list in merged_patch_list.items()
+        ]
+    for verification in verifications:
+        verification.result()
 
     nmeum_cyclonedx_patches: list[proj_types.CycloneCommit] = []
     added_cyclonedx_patches: list[proj_types.CycloneCommit] = []
@@ -313,98 +396,45 @@ def get_base_document(
         "https://github.com/softprops/action-gh-release/blob/master/LICENSE",
     )
 
-    submodule_mapping = [
-        (PurlNames.ags_core, submodules.core),
-        (PurlNames.ags_extras, submodules.extras),
-        (PurlNames.boringssl, submodules.boringssl),
-        (PurlNames.ags_mkbootimg, submodules.mkbootimg),
-        (PurlNames.ags_avb, submodules.avb),
-        (PurlNames.ags_libbase, submodules.libbase),
-        (PurlNames.ags_libziparchive, submodules.libziparchive),
-        (PurlNames.ags_adb, submodules.adb),
-        (PurlNames.ags_logging, submodules.logging),
-    ]
-
-    if submodules.selinux is not None:
-        submodule_mapping.append((PurlNames.ags_selinux, submodules.selinux))
-    if submodules.libusb is not None:
-        submodule_mapping.append((PurlNames.libusb, submodules.libusb))
-
-    submodule_components = []
-
-    for purl_key, submodule in submodule_mapping:
-        submodule_components.append(
-            cyclonedx.generators.get_submodule_component(
-                submodule.name, submodule.pinned_hash, purldb[purl_key], submodule.url
-            )
+    submodule_components = [
+        cyclonedx.generators.get_submodule_component(
+            submodule.name, submodule.pinned_hash, purldb[purl_key], submodule.url
         )
+        for field_name, purl_key in _SUBMODULE_PURLS
+        if (submodule := getattr(submodules, field_name)) is not None
+    ]
 
     wrap_components = []
 
-    _DPII = _DefectPatchIssueInfo  # noqa: N806
-    _EPII = _EnhancementPatchIssueInfo  # noqa: N806
-
-    noinstall = _EPII(
-        "installation process",
-        "Prevent the Wrap from installing its libraries and pkg-config files, since "
-        "they are not needed.",
-        None,
-        None,
-    )
-
-    known_patches_in: dict[str, _DefectPatchIssueInfo | _EnhancementPatchIssueInfo] = {
-        "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch": _DPII(
-            "cross build",
-            "Make abseil-cpp usable when both its cross and its native versions are "
-            "needed.",
-            "WrapDB GitHub Issues",
-            "https://github.com/mesonbuild/wrapdb/issues/1856",
-        ),
-        "abseil-cpp/0002-do-not-bother-building-unused-native-libs.patch": _EPII(
-            "optimization",
-            "(Patch modifying "
-            "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch) Build "
-            "only needed libraries twice during cross compilation.",
-            None,
-            None,
-        ),
-        "fmt/noinstall.patch": noinstall,
-        "libusb/noinstall.patch": noinstall,
-        "lz4/noinstall.patch": noinstall,
-        "pcre2/noinstall.patch": noinstall,
-        "protobuf/0001-fix-host-abseil-compilation.patch": _EPII(
-            "cross build",
-            "Adapt protobuf's build system to changes in "
-            "abseil-cpp/0001-build-both-host-and-build-libs-in-cross.patch which "
-            "improves cross compilation",
-            "WrapDB GitHub Issues",
-            "https://github.com/mesonbuild/wrapdb/issues/1856",
-        ),
-        "protobuf/0002-do-not-build-nonnative-protoc-during-cross-build.patch": _EPII(
-            "optimization", "Do not build non-native (host machine) protoc", None, None
-        ),
-        "protobuf/0004-fix-gcc-15-release-compilation.patch": _DPII(
-            "build",
-            "Fixe protobuf compilation on MSYS2 in release mode.",
-            "protobuf GitHub Issues",
-            "https://github.com/protocolbuffers/protobuf/issues/21333",
-        ),
-        "zlib/noinstall.patch": noinstall,
-        "zstd/noinstall.patch": noinstall,
-    }
-
     # The items in the dict below will be removed as they are processed. The dict
     # should be empty after all patches are processed.
-    known_patches = _process_known_patches(known_patches_in, source_dir)
+    known_patches = _process_known_patches(_KNOWN_WRAP_PATCHES, source_dir)
+
+    meson.wrap_patches.remove_stale_scratch_dirs(source_dir)
+
+    # Verifying the patches of a wrap executes git for every patch, so all wraps are
+    # verified concurrently. The patches are processed serially afterwards to keep the
+    # order of warnings deterministic.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        raw_patch_list_futures = {
+            wrap_name: executor.submit(
+                meson.wrap_patches.get_wrap_patch_list,
+                source_dir,
+                wrap_name,
+                meson.wrap_patches.PatchStrategy.GIT,
+                git_exe,
+            )
+            for wrap_name in wraps
+        }
 
     for wrap_name, wrap_info in wraps.items():
         wrap_components.append(
             _get_wrap_component(
                 wrap_name,
                 wrap_info,
+                raw_patch_list_futures[wrap_name].result(),
                 known_patches,
                 source_dir,
-                git_exe,
                 purldb,
                 repo_link,
             )
@@ -23,6 +23,8 @@ import proj_types
 from cyclonedx.generic_component import ComponentSupplier, ComponentType, ReferenceType
 from purldb.keys import PurlDB, PurlNames
 
+_KNOWN_RUNNERS = frozenset(("windows", "macos", "ubuntu"))
+
 
 def get_runner(
     runner_name_ver_combo: str, purldb: PurlDB
@@ -35,12 +37,11 @@ def get_runner(
           https://github.com/actions/runner-images
         purldb: purldb containing the PurlNames.github_runner key.
     """
-    for runner in ("windows", "macos", "ubuntu"):
-        if runner_name_ver_combo.startswith(runner + "-"):
-            github_runner_name = runner
-            github_runner_version = runner_name_ver_combo.removeprefix(f"{runner}-")
-            break
-    else:
+    # The name of the runner is always followed by a dash.
+    github_runner_name, sep, github_runner_version = runner_name_ver_combo.partition(
+        "-"
+    )
+    if not sep or github_runner_name not in _KNOWN_RUNNERS:
         sys.exit(
             f"The GitHub runner '{runner_name_ver_combo}' has an unrecognized "
             "prefix. If it is a custom runner, you should know that this script "
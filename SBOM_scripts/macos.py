@@ -19,8 +19,7 @@
 # https://cyclonedx.org/docs/1.6/json/
 
 import argparse
-import json
-import os
+import concurrent.futures
 import platform
 import shlex
 import shutil
@@ -49,6 +48,41 @@ from cyclonedx.generic_component import (
 from purldb.generate import generate as purldb_mod_generate
 from purldb.keys import PurlNames
 
+# Components android-tools-static depends on. libusb is handled separately, because it
+# may come either from a submodule or from a Wrap.
+_MACOS_DEPENDS_KEYS = (
+    PurlNames.github_runner,
+    PurlNames.action_gh_release,
+    PurlNames.ags_core,
+    PurlNames.ags_extras,
+    # TODO: Is selinux used on macOS?
+    PurlNames.ags_selinux,
+    # PurlNames.ags_f2fs_tools,
+    # PurlNames.ags_e2fsprogs,
+    PurlNames.boringssl,
+    PurlNames.ags_mkbootimg,
+    PurlNames.ags_avb,
+    PurlNames.ags_libbase,
+    PurlNames.ags_libziparchive,
+    PurlNames.ags_adb,
+    PurlNames.ags_logging,
+    # PurlNames.ags_libufdt,
+    PurlNames.wrap_fmt,
+    PurlNames.wrap_zlib,
+    PurlNames.wrap_google_brotli,
+    PurlNames.wrap_lz4,
+    PurlNames.wrap_zstd,
+    PurlNames.wrap_gtest,
+    PurlNames.wrap_abseil_cpp,
+    PurlNames.wrap_protobuf,
+    PurlNames.wrap_pcre2,
+    PurlNames.macos,
+    PurlNames.brew_meson,
+    PurlNames.brew_cmake,
+    PurlNames.apple_clang,
+    PurlNames.apple_clangpp,
+)
+
 _BrewPackageVersionsSelf = typing.TypeVar(
     "_BrewPackageVersionsSelf", bound="BrewPackageVersions"
 )
@@ -69,22 +103,28 @@ class BrewPackageVersions(typing.NamedTuple):
                 "Couldn't find 'brew' executable! Are you running this script outside "
                 "of MacOS?"
             )
+        pkg_names = ("meson", "cmake")
+        # All packages are queried at once to avoid executing brew repeatedly.
+        args = [brew_exe, "list", "--versions", *pkg_names]
+        proc = subprocess.run(
+            args=args,
+            text=True,
+            capture_output=True,
+            check=True,
+        )
         result = {}
-        for pkg_name in ("meson", "cmake"):
-            args = [brew_exe, "list", "--versions", pkg_name]
-            proc = subprocess.run(
-                args=args,
-                text=True,
-                capture_output=True,
-                check=True,
+        for line in proc.stdout.splitlines():
+            fields = line.split(maxsplit=2)
+            if len(fields) >= 2 and fields[0] in pkg_names:
+                result[fields[0]] = fields[1]
+        missing_pkgs = [pkg_name for pkg_name in pkg_names if pkg_name not in result]
+        if missing_pkgs:
+            raise RuntimeError(
+                f"Command `{shlex.join(args)}` produced unexpected output! Expected "
+                "a line starting with package name "
+                + ", ".join(f"'{name}'" for name in missing_pkgs)
+                + f" in the output.\n\n`{shlex.join(args)}` stdout:\n{proc.stdout}"
             )
-            if not proc.stdout.startswith(f"{pkg_name} "):
-                raise RuntimeError(
-                    f"Command `{shlex.join(args)}` produced unexpected output! "
-                    f"Expected package name '{pkg_name}' on the first (and only) line "
-                    f"of output.\n\n`{shlex.join(args)}` stdout:\n{proc.stdout}"
-                )
-            result[pkg_name] = proc.stdout.split(maxsplit=2)[1]
         return cls(**result)
 
 
@@ -108,29 +148,10 @@ if __name__ == "__main__":
     depmf_wrap_dict = meson.depmf.get_subproject_data(args.meson_depmf_file)
 
     # Infer some info from the depmf.json file.
-    project_version = depmf_wrap_dict["android-tools-static"].version
+    project_version = meson.depmf.get_version(depmf_wrap_dict, "android-tools-static")
     uses_bundled_libusb = args.uses_bundled_libusb == "true"
 
-    assert project_version is not None
-
-    match args.color:
-        case "always":
-            color = True
-        case "never":
-            color = False
-        case "auto":
-            # https://no-color.org/
-            if "NO_COLOR" in os.environ and len(os.environ["NO_COLOR"]) != 0:
-                color = False
-            else:
-                color = sys.stderr.isatty()
-        case _:
-            sys.exit(
-                f"Unknown color value '{args.color}'! This is likely a bug in the "
-                "script"
-            )
-
-    if color:
+    if args.color:
         warnings.formatwarning = base.ansi_warning_format
 
     target = base.Target(args.target_architecture, base.TargetOS.MACOS)
@@ -138,24 +159,61 @@ if __name__ == "__main__":
     #
     # Look for git.
     #
-    git_path = shutil.which("git")
+    git_path = base.find_git()
     if git_path is None:
         sys.exit("Couldn't find 'git' executable! Cannot proceed with SBOM generation.")
 
+    meson_exe = shutil.which("meson")
+    if meson_exe is None:
+        sys.exit("Couldn't find 'meson' executable!")
+
     #
     # Process input from various places.
     #
-    base_vers = base_versions.get_base_versions(source_dir)
-
-    repo_link = high_level.document.handle_repolink(
-        args.repolink_format, args.ref, git_path, source_dir
-    )
-
-    submodule_info = git.submodule_parsing.read_submodule_info(
-        source_dir, git_path, uses_bundled_libusb, target
-    )
-
-    wraps = meson.wrap_info.get_wraps_info(depmf_wrap_dict, source_dir, target)
+    # These steps are independent of each other and mostly wait for external tools or
+    # for file I/O, so they are run concurrently.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        base_vers_future = executor.submit(base_versions.get_base_versions, source_dir)
+        repo_link_future = executor.submit(
+            high_level.document.handle_repolink,
+            args.repolink_format,
+            args.ref,
+            git_path,
+            source_dir,
+        )
+        submodule_info_future = executor.submit(
+            git.submodule_parsing.read_submodule_info,
+            source_dir,
+            git_path,
+            uses_bundled_libusb,
+            target,
+        )
+        wraps_future = executor.submit(
+            meson.wrap_info.get_wraps_info, depmf_wrap_dict, source_dir, target
+        )
+        nmeum_patch_list_future = executor.submit(
+            high_level.document.read_patch_series,
+            args.nmeum_patch_series_file,
+            source_dir,
+        )
+        added_patch_list_future = executor.submit(
+            high_level.document.read_patch_series,
+            args.added_patch_series_file,
+            source_dir,
+        )
+        brew_versions_future = executor.submit(BrewPackageVersions.from_brew)
+        compilers_future = executor.submit(
+            meson.introspect_compiler.get_compilers, meson_exe, args.build_dir
+        )
+
+    base_vers = base_vers_future.result()
+    repo_link = repo_link_future.result()
+    submodule_info = submodule_info_future.result()
+    wraps = wraps_future.result()
+    nmeum_patch_list = nmeum_patch_list_future.result()
+    added_patch_list = added_patch_list_future.result()
+    brew_versions = brew_versions_future.result()
+    compilers = compilers_future.result()
 
     #
     # Assemble the input into processed components shared across all SBOM entrypoint
@@ -183,8 +241,8 @@ if __name__ == "__main__":
         args.github_runner_name_ver,
         args.softprops_action_gh_release_version,
         args.base_repolink,
-        args.nmeum_patch_series_file,
-        args.added_patch_series_file,
+        nmeum_patch_list,
+        added_patch_list,
         submodule_info,
         wraps,
         depmf_wrap_dict,
@@ -194,35 +252,34 @@ if __name__ == "__main__":
     #
     # Handle Linux-specific stuff.
     #
-    brew_versions = BrewPackageVersions.from_brew()
-
-    meson_exe = shutil.which("meson")
-    if meson_exe is None:
-        sys.exit("Couldn't find 'meson' executable!")
-    compilers = meson.introspect_compiler.get_compilers(meson_exe, args.build_dir)
+    c_compiler = compilers.host.c_compiler
+    cpp_compiler = compilers.host.cpp_compiler
 
-    clang_version = compilers.host.c_compiler.version
-    clangpp_version = compilers.host.cpp_compiler.version
+    assert c_compiler.id == meson.introspect_compiler.CompilerID.clang
+    assert cpp_compiler.id == meson.introspect_compiler.CompilerID.clang
 
-    assert compilers.host.c_compiler.id == meson.introspect_compiler.CompilerID.clang
-    assert compilers.host.cpp_compiler.id == meson.introspect_compiler.CompilerID.clang
+    # platform.mac_ver() reads a system property list, call it only once.
+    macos_version = platform.mac_ver()[0]
 
-    for purl, ver in (
-        (PurlNames.macos, platform.mac_ver()[0]),
-        (PurlNames.brew_meson, brew_versions.meson),
-        (PurlNames.brew_cmake, brew_versions.cmake),
-        (PurlNames.apple_clang, clang_version),
-        (PurlNames.apple_clangpp, clangpp_version),
-    ):
-        purldb[purl] = proj_types.Purl(f"{purl}@{ver}")
-        pass
+    purldb.update(
+        {
+            purl: proj_types.Purl(purl + "@" + ver)
+            for purl, ver in (
+                (PurlNames.macos, macos_version),
+                (PurlNames.brew_meson, brew_versions.meson),
+                (PurlNames.brew_cmake, brew_versions.cmake),
+                (PurlNames.apple_clang, c_compiler.version),
+                (PurlNames.apple_clangpp, cpp_compiler.version),
+            )
+        }
+    )
 
     brew_supplier = ComponentSupplier(name="Homebrew", url="https://brew.sh/")
 
     macos_components = [
         cyclonedx.generic_component.generate(
             name="macOS",
-            version=platform.mac_ver()[0],
+            version=macos_version,
             c_type=ComponentType.operating_system,
             ref=purldb[PurlNames.macos],
             description=("macOS operating system"),
@@ -239,19 +296,19 @@ if __name__ == "__main__":
         ),
         cyclonedx.generic_component.generate(
             name="Apple clang",
-            version=clang_version,
+            version=c_compiler.version,
             c_type=ComponentType.application,
             ref=purldb[PurlNames.apple_clang],
             description="Apple version of LLVM clang",
-            properties={"full_version": compilers.host.c_compiler.full_version},
+            properties={"full_version": c_compiler.full_version},
         ),
         cyclonedx.generic_component.generate(
             name="Apple clang++",
-            version=clangpp_version,
+            version=cpp_compiler.version,
             c_type=ComponentType.application,
             ref=purldb[PurlNames.apple_clangpp],
             description="Apple version of LLVM clang++",
-            properties={"full_version": compilers.host.cpp_compiler.full_version},
+            properties={"full_version": cpp_compiler.full_version},
         ),
         cyclonedx.generic_component.generate(
             name="CMake",
@@ -266,52 +323,13 @@ if __name__ == "__main__":
 
     document["components"].extend(macos_components)
 
+    libusb_purl = PurlNames.libusb if uses_bundled_libusb else PurlNames.wrap_libusb
+
     document["dependencies"] = [
         {
             "ref": purldb[PurlNames.android_tools_static],
-            "dependsOn": [
-                purldb[PurlNames.github_runner],
-                purldb[PurlNames.action_gh_release],
-                purldb[PurlNames.ags_core],
-                purldb[PurlNames.ags_extras],
-                # TODO: Is selinux used on macOS?
-                purldb[PurlNames.ags_selinux],
-                # purldb[PurlNames.ags_f2fs_tools]
-                # purldb[PurlNames.ags_e2fsprogs]
-                purldb[PurlNames.boringssl],
-                purldb[PurlNames.ags_mkbootimg],
-                purldb[PurlNames.ags_avb],
-                purldb[PurlNames.ags_libbase],
-                purldb[PurlNames.ags_libziparchive],
-                purldb[PurlNames.ags_adb],
-                purldb[PurlNames.ags_logging],
-                # purldb[PurlNames.ags_libufdt]
-                purldb[PurlNames.wrap_fmt],
-                purldb[PurlNames.wrap_zlib],
-                purldb[PurlNames.wrap_google_brotli],
-                purldb[PurlNames.wrap_lz4],
-                purldb[PurlNames.wrap_zstd],
-                purldb[PurlNames.wrap_gtest],
-                purldb[PurlNames.wrap_abseil_cpp],
-                purldb[PurlNames.wrap_protobuf],
-                purldb[PurlNames.wrap_pcre2],
-                purldb[PurlNames.macos],
-                purldb[PurlNames.brew_meson],
-                purldb[PurlNames.brew_cmake],
-                purldb[PurlNames.apple_clang],
-                purldb[PurlNames.apple_clangpp],
-            ],
+            "dependsOn": [purldb[purl] for purl in (*_MACOS_DEPENDS_KEYS, libusb_purl)],
         }
     ]
 
-    dependsOn = document["dependencies"][0]["dependsOn"]  # noqa: N816
-
-    if uses_bundled_libusb:
-        dependsOn.append(purldb[PurlNames.libusb])
-    else:
-        dependsOn.append(purldb[PurlNames.wrap_libusb])
-
-    try:
-        json.dump(document, sys.stdout)
-    except OSError as exc:
-        sys.exit(str(exc))
+    base.write_output(base.encode_document(document))
@@ -44,8 +44,7 @@ def get_subproject_data(depmf_path: Path) -> dict[str, SubprojectInfo]:
         function call, these names may not correspond with the .wrap file names) and
         whose values are SubprojectInfo.
     """
-    with open(depmf_path) as input:
-        depmf = json.load(input)
+    depmf = json.loads(depmf_path.read_bytes())
 
     if "type" not in depmf:
         raise RuntimeError(
@@ -67,15 +66,39 @@ def get_subproject_data(depmf_path: Path) -> dict[str, SubprojectInfo]:
     result = {}
 
     for subproject_name, info in depmf["projects"].items():
-        version = info["version"] if info["version"] != "undefined" else None
+        version = info["version"]
+        licenses = info["license"]
 
-        assert len(info["license"]) == 1
+        if len(licenses) != 1:
+            raise RuntimeError(
+                f"The subproject '{subproject_name}' in '{depmf_path}' has "
+                f"{len(licenses)} licenses, expected exactly one!"
+            )
 
-        spdx_license = info["license"][0] if info["license"][0] != "unknown" else None
+        spdx_license = licenses[0]
 
         result[subproject_name] = SubprojectInfo(
-            spdx_license_identifier=spdx_license,
-            version=version,
+            spdx_license_identifier=spdx_license if spdx_license != "unknown" else None,
+            version=version if version != "undefined" else None,
         )
 
     return result
+
+
+def get_version(meson_depmf: dict[str, SubprojectInfo], subproject_name: str) -> str:
+    """Get the version of a subproject which must have a defined version.
+
+    Arguments:
+        meson_depmf: Processed contents of depmf.json file.
+        subproject_name: Name of the subproject.
+
+    Returns:
+        The version of the subproject.
+    """
+    version = meson_depmf[subproject_name].version
+    if version is None:
+        raise RuntimeError(
+            f"The subproject '{subproject_name}' has an undefined version in "
+            "depmf.json! Make sure that its project() call sets a version."
+        )
+    return version
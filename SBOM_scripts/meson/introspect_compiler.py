@@ -72,17 +72,20 @@ class CompilerID(enum.StrEnum):
     tasking = "tasking"
 
 
+_COMPILER_IDS = {compiler_id.value: compiler_id for compiler_id in CompilerID}
+
+
 def _get_compiler_id(name: str) -> CompilerID:
-    try:
-        return CompilerID(name)
-    except ValueError:
+    compiler_id = _COMPILER_IDS.get(name)
+    if compiler_id is None:
         raise RuntimeError(
             f"Meson reported unknown compiler id '{name}'! This most likely means "
             "that you are using a newer version of Meson than anticipated which added "
             "support for compilers which weren't known at the time this subpackage of "
             "the SBOM generation framework was updated. The module which raised this "
             "exception will have to be updated."
-        ) from None
+        )
+    return compiler_id
 
 
 class Compiler(typing.NamedTuple):
@@ -109,24 +112,17 @@ class Compilers(typing.NamedTuple):
 
 def get_compilers(meson_exe: str, build_dir: Path) -> Compilers:
     """Get info about the compilers used in a builddir."""
-    args = [meson_exe, "introspect", "--compilers"]
-    proc = subprocess.Popen(
-        args=args,
-        text=True,
-        cwd=build_dir,
+    # The output is parsed as bytes, json.loads() detects its encoding by itself.
+    # stderr is not captured. meson normally prints nothing there, and if it fails, its
+    # error message goes directly to the user.
+    proc = subprocess.run(
+        args=[meson_exe, "introspect", "--compilers"],
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
+        cwd=build_dir,
+        check=True,
     )
 
-    # Make mypy happy.
-    assert proc.stdout is not None
-
-    json_doc = json.load(proc.stdout)
-
-    stderr = proc.communicate()[1]
-
-    if proc.returncode != 0:
-        raise subprocess.CalledProcessError(proc.returncode, args, None, stderr)
+    json_doc = json.loads(proc.stdout)
 
     return Compilers(
         host=CompilerMachineInfo(
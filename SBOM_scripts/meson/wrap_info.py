@@ -15,7 +15,6 @@
 """Module combining several sources of info to get all available Meson Wrap info."""
 
 import enum
-import re
 import typing
 from pathlib import Path
 
@@ -50,6 +49,50 @@ class KnownWraps(enum.StrEnum):
     pcre2 = "pcre2"
 
 
+_KNOWN_WRAPS = {
+    KnownWraps.fmt: _KnownWrapInfo(PurlNames.wrap_fmt, "Modern formatting library"),
+    KnownWraps.zlib: _KnownWrapInfo(
+        PurlNames.wrap_zlib, "General purpose data compression library"
+    ),
+    KnownWraps.google_brotli: _KnownWrapInfo(
+        PurlNames.wrap_google_brotli,
+        "Generic-purpose lossless compression algorithm",
+    ),
+    KnownWraps.lz4: _KnownWrapInfo(
+        PurlNames.wrap_lz4, "Lossless compression algorithm"
+    ),
+    KnownWraps.zstd: _KnownWrapInfo(
+        PurlNames.wrap_zstd, "Fast lossless compression algorithm"
+    ),
+    KnownWraps.libusb: _KnownWrapInfo(
+        PurlNames.wrap_libusb, "Cross-platform library to access USB devices"
+    ),
+    KnownWraps.gtest: _KnownWrapInfo(
+        PurlNames.wrap_gtest, "Google Testing and Mocking Framework"
+    ),
+    KnownWraps.abseil_cpp: _KnownWrapInfo(
+        PurlNames.wrap_abseil_cpp,
+        "Open-source collection of C++ code (compliant to C++17) designed to "
+        "augment the C++ standard library",
+    ),
+    KnownWraps.protobuf: _KnownWrapInfo(
+        PurlNames.wrap_protobuf, "Google's data interchange format"
+    ),
+    KnownWraps.pcre2: _KnownWrapInfo(
+        PurlNames.wrap_pcre2,
+        "Set of C functions that implement regular expression pattern matching",
+    ),
+}
+
+_KNOWN_WRAP_NAMES = frozenset(name.value for name in KnownWraps)
+
+_WRAP_NAME2KEY_NAME = {value.value: value for value in KnownWraps}
+
+# Subprojects which aren't Wraps from the wrapdb.
+_NON_WRAP_SUBPROJECTS = frozenset(("android-tools-static", "BoringSSL"))
+_WINDOWS_NON_WRAP_SUBPROJECTS = _NON_WRAP_SUBPROJECTS | {"AdbWinApi"}
+
+
 class MesonWrapInfo(typing.NamedTuple):
     """Complete info about a Meson Wrap."""
 
@@ -83,41 +126,6 @@ def get_wraps_info(
         with each other (the wrapdb_version will contain an additional revision
         suffix).
     """
-    _KWI = _KnownWrapInfo  # noqa: N806
-
-    known_wraps = {
-        KnownWraps.fmt: _KWI(PurlNames.wrap_fmt, "Modern formatting library"),
-        KnownWraps.zlib: _KWI(
-            PurlNames.wrap_zlib, "General purpose data compression library"
-        ),
-        KnownWraps.google_brotli: _KWI(
-            PurlNames.wrap_google_brotli,
-            "Generic-purpose lossless compression algorithm",
-        ),
-        KnownWraps.lz4: _KWI(PurlNames.wrap_lz4, "Lossless compression algorithm"),
-        KnownWraps.zstd: _KWI(
-            PurlNames.wrap_zstd, "Fast lossless compression algorithm"
-        ),
-        KnownWraps.libusb: _KWI(
-            PurlNames.wrap_libusb, "Cross-platform library to access USB devices"
-        ),
-        KnownWraps.gtest: _KWI(
-            PurlNames.wrap_gtest, "Google Testing and Mocking Framework"
-        ),
-        KnownWraps.abseil_cpp: _KWI(
-            PurlNames.wrap_abseil_cpp,
-            "Open-source collection of C++ code (compliant to C++17) designed to "
-            "augment the C++ standard library",
-        ),
-        KnownWraps.protobuf: _KWI(
-            PurlNames.wrap_protobuf, "Google's data interchange format"
-        ),
-        KnownWraps.pcre2: _KWI(
-            PurlNames.wrap_pcre2,
-            "Set of C functions that implement regular expression pattern matching",
-        ),
-    }
-
     used_bundled_libusb = "libusb" in meson_depmf
 
     # This should only contain the Wraps used without the primary project (which is
@@ -125,30 +133,29 @@ def get_wraps_info(
     # for which Meson won't give any useful info and which isn't a Wrap from wrapdb and
     # without AdbWinApi, which is a conditional Windows-only subproject, which also
     # doesn't come from the wrapdb.
-    filtered_subproject_data = {
-        key: value
-        for key, value in meson_depmf.items()
-        if key not in ("android-tools-static", "BoringSSL")
-    }
-
+    non_wrap_subprojects = _NON_WRAP_SUBPROJECTS
     if target.operating_system == base.TargetOS.WINDOWS:
-        if "AdbWinApi" not in filtered_subproject_data:
+        if "AdbWinApi" not in meson_depmf:
             raise RuntimeError(
                 "'AdbWinApi' is not present in the supplied depmf.json! You are "
                 "probably using the wrong script entrypoint to build the SBOM (a "
                 "Windows one instead of a Linux or MacOS one)."
             )
-        del filtered_subproject_data["AdbWinApi"]
+        non_wrap_subprojects = _WINDOWS_NON_WRAP_SUBPROJECTS
 
-    known_wrap_names = {str(name) for name in KnownWraps.__members__.values()}
+    filtered_subproject_data = {
+        key: value
+        for key, value in meson_depmf.items()
+        if key not in non_wrap_subprojects
+    }
 
-    missing_keys = known_wrap_names - filtered_subproject_data.keys()
-    added_keys = filtered_subproject_data.keys() - known_wrap_names
+    missing_keys = _KNOWN_WRAP_NAMES - filtered_subproject_data.keys()
+    added_keys = filtered_subproject_data.keys() - _KNOWN_WRAP_NAMES
 
     if not used_bundled_libusb:
         # If we're using libusb from a wrap, disable logic for vendored libusb (since
         # it isn't used).
-        missing_keys.discard("libusb")
+        missing_keys -= {"libusb"}
 
     if missing_keys or added_keys:
         error_description = ""
@@ -170,12 +177,10 @@ def get_wraps_info(
 
     result = {}
 
-    wrap_name2key_name = {
-        str(value): value for value in KnownWraps.__members__.values()
-    }
+    subprojects_dir = source_dir / "subprojects"
 
     for wrap_name, wrap_info in filtered_subproject_data.items():
-        wrap_path = source_dir / "subprojects" / (wrap_name + ".wrap")
+        wrap_path = subprojects_dir / (wrap_name + ".wrap")
         wrapdb_version = wrap_parse.get_wrap_info(wrap_path).wrapdb_version
 
         assert wrap_info.version is not None
@@ -183,8 +188,12 @@ def get_wraps_info(
         # the wrapfile match.
         # The logic below handles the revision number suffix, which is only in
         # wrapdb_version.
-        if not wrapdb_version.startswith(wrap_info.version) or not re.fullmatch(
-            r"-\d+", wrapdb_version.removeprefix(wrap_info.version)
+        # The revision suffix is a dash followed by decimal digits.
+        revision = wrapdb_version.removeprefix(wrap_info.version)
+        if (
+            not wrapdb_version.startswith(wrap_info.version)
+            or revision[:1] != "-"
+            or not revision[1:].isdecimal()
         ):
             raise RuntimeError(
                 f"Found non-matching versions of the '{wrap_name}' dependency wrap! "
@@ -193,13 +202,13 @@ def get_wraps_info(
                 f"revision suffix is ignored), whereas the Wrap file '{wrap_path}' "
                 f"reports version '{wrapdb_version}'"
             )
-        known_wrap_key = wrap_name2key_name[wrap_name]
+        known_wrap_key = _WRAP_NAME2KEY_NAME[wrap_name]
         result[wrap_name] = MesonWrapInfo(
             version=wrap_info.version,
-            purl=known_wraps[known_wrap_key].purl,
+            purl=_KNOWN_WRAPS[known_wrap_key].purl,
             spdx_expression=wrap_info.spdx_license_identifier,
             wrapdb_version=wrapdb_version,
-            description=known_wraps[known_wrap_key].description,
+            description=_KNOWN_WRAPS[known_wrap_key].description,
         )
 
     return result
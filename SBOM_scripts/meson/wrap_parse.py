@@ -15,6 +15,7 @@
 """Module for parsing Meson .wrap files."""
 
 import configparser
+import functools
 import typing
 from pathlib import Path
 
@@ -33,12 +34,26 @@ class WrapInfo(typing.NamedTuple):
     wrapdb_version: str
 
 
-def get_wrap_info(wrap_path: Path) -> WrapInfo:
-    """Get info about a specified Wrap by parsing its .wrap file.
+@functools.cache
+def read_wrap_file(wrap_path: Path) -> configparser.ConfigParser:
+    """Parse a .wrap file.
+
+    Wrap files don't change while the SBOM is generated, so the parsed file is cached.
+    The returned object is shared between all callers and must not be modified.
 
     Arguments:
         wrap_path: Path to the .wrap file.
     """
     wrap = configparser.ConfigParser()
     wrap.read(wrap_path)
+    return wrap
+
+
+def get_wrap_info(wrap_path: Path) -> WrapInfo:
+    """Get info about a specified Wrap by parsing its .wrap file.
+
+    Arguments:
+        wrap_path: Path to the .wrap file.
+    """
+    wrap = read_wrap_file(wrap_path)
     return WrapInfo(wrapdb_version=wrap["wrap-file"]["wrapdb_version"])
@@ -14,34 +14,102 @@
 
 """Module for obtaining patches applied against a Meson Wrap."""
 
-import configparser
 import enum
+import os
 import shutil
 import subprocess
 import tempfile
+import time
+import typing
 from pathlib import Path
 
+from . import wrap_parse
 
-def _git_unpatch(git_exe: str, subproj_path: Path, patch_path: Path) -> None:
+
+# Only stderr is kept, it ends up in the CalledProcessError if the command fails. The
+# output printed on success is not needed.
+def _git_unpatch(
+    git_exe: str, subproj_path: Path, patch_path: Path, dry_run: bool
+) -> None:
+    args = [git_exe, "apply", "--reverse"]
+    if dry_run:
+        args.append("--check")
     subprocess.run(
-        args=[git_exe, "apply", "--reverse", patch_path],
-        capture_output=True,
+        args=[*args, patch_path],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         check=True,
         close_fds=True,
         cwd=subproj_path,
     )
 
 
-def _patch_unpatch(patch_exe: str, subproj_path: Path, patch_path: Path) -> None:
+def _patch_unpatch(
+    patch_exe: str, subproj_path: Path, patch_path: Path, dry_run: bool
+) -> None:
+    args = [patch_exe, "-R"]
+    if dry_run:
+        args.append("--dry-run")
     subprocess.run(
-        args=[patch_exe, "-R", "-i", patch_path],
-        capture_output=True,
+        args=[*args, "-i", patch_path],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         check=True,
         close_fds=True,
         cwd=subproj_path,
     )
 
 
+def _link_or_copy(src: str, dst: str) -> None:
+    # Both git apply and patch replace the files they modify instead of rewriting them
+    # in place, so a hardlink can't propagate changes back to the source file.
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+# Prefix of the scratch directories created in subprojects/.
+_SCRATCH_DIR_PREFIX = ".sbom-"
+
+# Scratch directories older than this (in seconds) are considered to be left behind by
+# interrupted runs. Younger ones may belong to a concurrent run.
+_STALE_SCRATCH_DIR_AGE = 60 * 60
+
+
+def _make_scratch_dir(subproj_path: Path) -> "tempfile.TemporaryDirectory[str]":
+    # The copy is made of hardlinks where possible, so the temporary directory is
+    # preferably created next to the subproject to be on the same filesystem. The source
+    # tree may be read-only though.
+    try:
+        return tempfile.TemporaryDirectory(
+            prefix=_SCRATCH_DIR_PREFIX, dir=subproj_path.parent
+        )
+    except OSError:
+        return tempfile.TemporaryDirectory(prefix="sbom-")
+
+
+def remove_stale_scratch_dirs(source_dir: Path) -> None:
+    """Remove scratch directories left behind in subprojects/ by interrupted runs.
+
+    get_wrap_patch_list() may create a hardlinked copy of a subproject next to it. The
+    copy is normally removed right after it's used. Recently modified scratch
+    directories are kept, because they may belong to a concurrent run.
+
+    Arguments:
+        source_dir: Path to the root source repository.
+    """
+    threshold = time.time() - _STALE_SCRATCH_DIR_AGE
+    for path in (source_dir / "subprojects").glob(_SCRATCH_DIR_PREFIX + "*"):
+        try:
+            if not path.is_dir() or path.stat().st_mtime >= threshold:
+                continue
+        except OSError:
+            continue
+        # Removing a hardlink doesn't affect the original file.
+        shutil.rmtree(path, ignore_errors=True)
+
+
 class PatchStrategy(enum.Enum):
     """Patch strategy to use in get_wrap_patch_list()."""
 
@@ -49,12 +117,42 @@ class PatchStrategy(enum.Enum):
     PATCH = enum.auto()
 
 
+_UNPATCH_FUNCTIONS: dict[
+    PatchStrategy, typing.Callable[[str, Path, Path, bool], None]
+] = {
+    PatchStrategy.GIT: _git_unpatch,
+    PatchStrategy.PATCH: _patch_unpatch,
+}
+
+
 class MissingPatchError(RuntimeError):
     """Exception raised when get_wrap_patch_list() can't verify a patch."""
 
     pass
 
 
+def _reverse_patches(
+    unpatch: typing.Callable[[str, Path, Path, bool], None],
+    unpatch_exe: str,
+    patch_paths: list[Path],
+    subproj_path: Path,
+    work_path: Path,
+    dry_run: bool,
+) -> None:
+    for patch_path in patch_paths:
+        # This will throw if there are patch errors.
+        try:
+            unpatch(unpatch_exe, work_path, patch_path, dry_run)
+        except subprocess.CalledProcessError as exc:
+            raise MissingPatchError(
+                f"The '{patch_path}' patch doesn't appear to be applied to the "
+                f"'{subproj_path}' subproject! Please regenerate all subprojects "
+                "(which can be achieved by deleting all directories in "
+                "subprojects/ except subprojects/packagefiles/) and rebuild the "
+                "project."
+            ) from exc
+
+
 def get_wrap_patch_list(
     source_dir: Path, wrap_name: str, patch_strategy: PatchStrategy, git_patch_path: str
 ) -> list[Path]:
@@ -71,29 +169,18 @@ def get_wrap_patch_list(
         git_patch_path: Path to the executable needed by patch_strategy. At the time of
           writing this, this may be a path to git or patch executable.
     """
-    wrap = configparser.ConfigParser()
-    wrap.read(source_dir / "subprojects" / (wrap_name + ".wrap"))
+    wrap = wrap_parse.read_wrap_file(source_dir / "subprojects" / (wrap_name + ".wrap"))
 
     if "diff_files" not in wrap["wrap-file"]:
         return []
 
     subproj_path = source_dir / "subprojects" / wrap["wrap-file"]["directory"]
 
-    match patch_strategy:
-        case PatchStrategy.GIT:
-
-            def reverse_patch(path: Path, subproj_path: Path) -> None:
-                return _git_unpatch(git_patch_path, subproj_path, path)
-
-        case PatchStrategy.PATCH:
-
-            def reverse_patch(path: Path, subproj_path: Path) -> None:
-                return _patch_unpatch(git_patch_path, subproj_path, path)
-
-        case _:
-            raise RuntimeError(
-                "Unknown patch_strategy! This is likely a bug in the script."
-            )
+    unpatch = _UNPATCH_FUNCTIONS.get(patch_strategy)
+    if unpatch is None:
+        raise RuntimeError(
+            "Unknown patch_strategy! This is likely a bug in the script."
+        )
 
     patch_list = [patch.strip() for patch in wrap["wrap-file"]["diff_files"].split(",")]
 
@@ -110,35 +197,35 @@ def get_wrap_patch_list(
     # 1. leaves me uncertain and the process is in general more complicated, so we'll
     # do with the current process instead.
     #
-    # By the way, the current process copies the subprojects/<wrap> directory to a
-    # temporary directory and tries to undo all of the patches marked in the Wrap file.
-    # If this script cannot undo the patches, it likely means that the patch was never
-    # applied in the first place, which will lead to an inconsistency in the supply
-    # chain.
-    with tempfile.TemporaryDirectory() as dir_name:
+    # By the way, the current process tries to undo all of the patches marked in the
+    # Wrap file. If this script cannot undo the patches, it likely means that the patch
+    # was never applied in the first place, which will lead to an inconsistency in the
+    # supply chain.
+    #
+    # A single patch is only checked in place, nothing is modified. Patches of a Wrap
+    # with multiple patches may build on top of each other, so each patch has to be
+    # really undone before the previous one can be checked. The subprojects/<wrap>
+    # directory is copied to a temporary directory in that case.
+    packagefiles_dir = source_dir / "subprojects/packagefiles"
+    patch_paths = [
+        packagefiles_dir / patch_relpath for patch_relpath in reversed(patch_list)
+    ]
+
+    if len(patch_paths) == 1:
+        _reverse_patches(
+            unpatch, git_patch_path, patch_paths, subproj_path, subproj_path, True
+        )
+        return patch_paths
+
+    with _make_scratch_dir(subproj_path) as dir_name:
         dir_path = Path(dir_name)
 
         shutil.copytree(
-            subproj_path, dir_path, copy_function=shutil.copyfile, dirs_exist_ok=True
+            subproj_path, dir_path, copy_function=_link_or_copy, dirs_exist_ok=True
         )
 
-        result = []
-
-        for patch_relpath in reversed(patch_list):
-            patch_path = source_dir / "subprojects/packagefiles" / patch_relpath
-
-            # This will throw if there are patch errors.
-            try:
-                reverse_patch(patch_path, dir_path)
-            except subprocess.CalledProcessError as exc:
-                raise MissingPatchError(
-                    f"The '{patch_path}' patch doesn't appear to be applied to the "
-                    f"'{subproj_path}' subproject! Please regenerate all subprojects "
-                    "(which can be achieved by deleting all directories in "
-                    "subprojects/ except subprojects/packagefiles/) and rebuild the "
-                    "project."
-                ) from exc
-
-            result.append(patch_path)
+        _reverse_patches(
+            unpatch, git_patch_path, patch_paths, subproj_path, dir_path, False
+        )
 
-        return result
+    return patch_paths
@@ -17,6 +17,7 @@
 """Helper script which saves all of its arguments to a specified file."""
 
 import argparse
+import os
 import sys
 
 if __name__ == "__main__":
@@ -35,10 +36,13 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    result = "\0".join(args.paths)
+    # The arguments are encoded back to the exact bytes they were passed as, even if
+    # they aren't valid in the filesystem encoding. The patch series files are decoded
+    # with os.fsdecode().
+    result = b"\0".join(map(os.fsencode, args.paths))
 
     if args.output_file == "-":
-        sys.stdout.write(result)
+        sys.stdout.buffer.write(result)
     else:
-        with open(args.output_file, "w") as file:
+        with open(args.output_file, "wb") as file:
             file.write(result)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 meator
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent on-disk cache of generated SBOM documents.
+
+Generating an SBOM requires executing git many times and processing a lot of input
+files. If none of the inputs have changed since the last run, the previously generated
+document can be reused.
+
+The cache key is a hash of all inputs of the SBOM entrypoint script: its command line
+arguments, the contents of the input files, info about the build environment, the state
+of the source repository (including the contents of the modifications, the commits the
+submodules are checked out at and the patch and Wrap files) and the source code of the
+SBOM scripts themselves.
+
+The extracted Wrap subprojects in subprojects/ are not part of the key, a cached
+document is reused without verifying them. Because of this, the cache is opt-in.
+
+A document retrieved from the cache gets a new serial number and timestamp.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import typing
+import uuid
+from pathlib import Path
+
+import base
+import git.util
+
+# Increase this when the format of the cache key changes.
+_CACHE_KEY_VERSION = b"3"
+
+# Command line arguments which don't influence the contents of the generated document.
+_OUTPUT_ONLY_ARGS = frozenset({"color", "sbom_cache"})
+
+# Files in the source directory read while generating the SBOM.
+_SOURCE_INPUT_GLOBS = (
+    "patches/**/*",
+    "subprojects/*.wrap",
+    "subprojects/packagefiles/**/*",
+)
+
+
+def get_cache_dir() -> Path:
+    """Get the directory in which cached SBOM documents are stored."""
+    if xdg_cache_home := os.environ.get("XDG_CACHE_HOME"):
+        cache_home = Path(xdg_cache_home)
+    else:
+        cache_home = Path.home() / ".cache"
+    return cache_home / "android-tools-sbom"
+
+
+def compute_key(
+    args: argparse.Namespace,
+    input_files: typing.Iterable[Path],
+    extra_inputs: typing.Iterable[str],
+    git_exe: str,
+    source_dir: Path,
+) -> str | None:
+    """Compute the cache key of a SBOM document.
+
+    Arguments:
+        args: Parsed command line arguments of the SBOM entrypoint script.
+        input_files: Files whose contents influence the resulting SBOM.
+        extra_inputs: Additional info influencing the resulting SBOM which isn't stored
+          in a file (versions of packages retrieved from a package manager...).
+        git_exe: Path to the git executable.
+        source_dir: Path to the root source directory.
+
+    Returns:
+        The cache key or None if the state of the source repository can't be
+        determined. SBOM documents should not be cached in that case.
+    """
+    hasher = hashlib.blake2b(_CACHE_KEY_VERSION)
+
+    def update(data: bytes) -> None:
+        # Length-prefix all fields to make the key unambiguous.
+        hasher.update(len(data).to_bytes(8, "little"))
+        hasher.update(data)
+
+    update(
+        repr(
+            sorted(
+                (name, value)
+                for name, value in vars(args).items()
+                if name not in _OUTPUT_ONLY_ARGS
+            )
+        ).encode()
+    )
+
+    for path in input_files:
+        update(path.read_bytes())
+
+    for extra_input in extra_inputs:
+        update(extra_input.encode())
+
+    try:
+        update(git.util.get_head(git_exe, source_dir).encode())
+        update(git.util.get_worktree_diff(git_exe, source_dir))
+        update(git.util.get_submodule_heads(git_exe, source_dir).encode())
+    except subprocess.CalledProcessError:
+        return None
+
+    # Patches and Wrap files may also be untracked (a newly added patch for example),
+    # which the git diff doesn't cover.
+    for pattern in _SOURCE_INPUT_GLOBS:
+        for path in sorted(source_dir.glob(pattern)):
+            if path.is_file():
+                update(path.relative_to(source_dir).as_posix().encode())
+                update(path.read_bytes())
+
+    for script_path in sorted(Path(__file__).parent.glob("**/*.py")):
+        update(script_path.read_bytes())
+
+    return hasher.hexdigest()
+
+
+def load(key: str) -> bytes | None:
+    """Return a cached SBOM document or None if it isn't cached.
+
+    The serial number and the timestamp of the cached document are replaced, because
+    CycloneDX requires every BOM to have a unique serial number.
+    """
+    try:
+        document = json.loads((get_cache_dir() / (key + ".json")).read_bytes())
+    except FileNotFoundError:
+        return None
+    document["serialNumber"] = uuid.uuid4().urn
+    document["metadata"]["timestamp"] = base.generate_timestamp()
+    return base.encode_document(document)
+
+
+def store(key: str, document: bytes) -> None:
+    """Store a SBOM document in the cache.
+
+    Failure to write to the cache is not considered to be an error.
+    """
+    cache_dir = get_cache_dir()
+    temp_path = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write the document to a temporary file first to prevent other processes from
+        # seeing partially written documents.
+        with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as file:
+            temp_path = file.name
+            file.write(document)
+        os.replace(temp_path, cache_dir / (key + ".json"))
+    except OSError:
+        if temp_path is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(temp_path)
@@ -17,9 +17,29 @@
 """Module storing argparse arguments shared across all three SBOM generation scripts."""
 
 import argparse
+import os
+import sys
 from pathlib import Path
 
 
+def _color(value: str) -> bool:
+    """Convert the --color argument to a bool saying whether color should be used."""
+    match value:
+        case "always":
+            return True
+        case "never":
+            return False
+        case "auto":
+            # https://no-color.org/
+            if os.environ.get("NO_COLOR"):
+                return False
+            return sys.stderr.isatty()
+        case _:
+            raise argparse.ArgumentTypeError(
+                f"invalid choice: '{value}' (choose from 'always', 'never', 'auto')"
+            )
+
+
 def add(parser: argparse.ArgumentParser) -> None:
     """Add arguments common to all SBOM generator entrypoints.
 
@@ -82,7 +102,8 @@ def add(parser: argparse.ArgumentParser) -> None:
     )
     parser.add_argument(
         "--color",
-        choices=["always", "never", "auto"],
+        type=_color,
+        metavar="{always,never,auto}",
         default="auto",
         help=(
             "Display ANSI colors (currently for warnings only, overrides $NO_COLOR "
@@ -19,10 +19,8 @@
 # https://cyclonedx.org/docs/1.6/json/
 
 import argparse
-import configparser
+import functools
 import itertools
-import json
-import os
 import platform
 import re
 import shutil
@@ -34,14 +32,9 @@ import warnings
 from pathlib import Path
 
 import base
-import base_versions
-import cyclonedx.generators
 import cyclonedx.generic_component
 import cyclonedx.util
-import git.submodule_parsing
-import high_level.document
-import meson.depmf
-import meson.wrap_info
+import meson.wrap_parse
 import proj_types
 import shared_arguments
 from cyclonedx.generic_component import (
@@ -51,9 +44,49 @@ from cyclonedx.generic_component import (
     ReferenceType,
 )
 from cyclonedx.util import HashTypes, Licenses
-from purldb.generate import generate as purldb_mod_generate
 from purldb.keys import PurlDB, PurlNames
 
+_SHA_256_RE = re.compile(r"[0-9a-f]{64}")
+
+_GITHUB_SUPPLIER = ComponentSupplier(name="GitHub, Inc.", url="https://github.com/")
+_MSYS2_SUPPLIER = ComponentSupplier(name="MSYS2", url="https://www.msys2.org/")
+
+
+# Components android-tools-static depends on. libusb is handled separately, because it
+# may come either from a submodule or from a Wrap.
+_WINDOWS_DEPENDS_KEYS = (
+    PurlNames.github_runner,
+    PurlNames.action_gh_release,
+    PurlNames.ags_core,
+    PurlNames.ags_extras,
+    # PurlNames.ags_f2fs_tools,
+    # PurlNames.ags_e2fsprogs,
+    PurlNames.boringssl,
+    PurlNames.ags_mkbootimg,
+    PurlNames.ags_avb,
+    PurlNames.ags_libbase,
+    PurlNames.ags_libziparchive,
+    PurlNames.ags_adb,
+    PurlNames.ags_logging,
+    # PurlNames.ags_libufdt,
+    PurlNames.wrap_fmt,
+    PurlNames.wrap_zlib,
+    PurlNames.wrap_google_brotli,
+    PurlNames.wrap_lz4,
+    PurlNames.wrap_zstd,
+    PurlNames.wrap_gtest,
+    PurlNames.wrap_abseil_cpp,
+    PurlNames.wrap_protobuf,
+    PurlNames.wrap_pcre2,
+    PurlNames.adbwinapi,
+    PurlNames.windows,
+    PurlNames.msys2_meson,
+    PurlNames.msys2_gcc,
+    PurlNames.msys2_cmake,
+    PurlNames.msys2_nasm,
+    PurlNames.setup_msys2,
+)
+
 
 class _AdbWinApi_info(typing.NamedTuple):  # noqa: N801
     hash: str
@@ -62,12 +95,11 @@ class _AdbWinApi_info(typing.NamedTuple):  # noqa: N801
 
 def _get_AdbWinApi_info(source_dir: Path) -> _AdbWinApi_info:  # noqa: N802
     """Return the SHA256SUM and source_url of currently used AdbWinApi dependency."""
-    wrap = configparser.ConfigParser()
-    wrap.read(source_dir / "subprojects/AdbWinApi.wrap")
+    wrap = meson.wrap_parse.read_wrap_file(source_dir / "subprojects/AdbWinApi.wrap")
 
     hash = wrap["wrap-file"]["source_hash"]
 
-    assert re.fullmatch(r"[0-9a-f]{64}", hash) is not None
+    assert _SHA_256_RE.fullmatch(hash) is not None
 
     return _AdbWinApi_info(hash=hash, source_url=wrap["wrap-file"]["source_url"])
 
@@ -78,14 +110,12 @@ def _get_AdbWinApi(  # noqa: N802
     adbwinapi_version: str,
     target: base.Target,
 ) -> proj_types.CycloneComponent:
-    wrap = configparser.ConfigParser()
-    wrap.read(source_dir / "subprojects/AdbWinApi.wrap")
+    adbwinapi_info = _get_AdbWinApi_info(source_dir)
 
-    raw_url = wrap["wrap-file"]["source_url"]
-    url = urllib.parse.urlsplit(raw_url)
+    url = urllib.parse.urlsplit(adbwinapi_info.source_url)
 
-    url_path = Path(url.path)
-    zip_name = url_path.name
+    # URL paths always use forward slashes, pathlib isn't needed to split them.
+    url_dir, _, zip_name = url.path.rpartition("/")
 
     assert zip_name.endswith(".zip")
     assert zip_name.startswith("AdbWinApi-")
@@ -104,12 +134,10 @@ def _get_AdbWinApi(  # noqa: N802
         zip_name.removesuffix(".zip") + f"-{adbwinapi_arch}-sbom.cyclonedx.json"
     )
 
-    url = url._replace(path=(url_path.parent / sbom_name).as_posix())
+    url = url._replace(path=url_dir + "/" + sbom_name)
 
     sbom_link = urllib.parse.urlunsplit(url)
 
-    adbwinapi_info = _get_AdbWinApi_info(source_dir)
-
     generate_reference = cyclonedx.generic_component.generate_reference
 
     distribution_reference = generate_reference(
@@ -126,7 +154,7 @@ def _get_AdbWinApi(  # noqa: N802
         description="Windows support libraries for android-tools",
         c_type=ComponentType.library,
         ref=purldb[PurlNames.adbwinapi],
-        supplier=ComponentSupplier(name="GitHub, Inc.", url="https://github.com/"),
+        supplier=_GITHUB_SUPPLIER,
         author=ComponentAuthor(name="meator", email="meator.dev@gmail.com"),
         references=[
             generate_reference(type=ReferenceType.bom, url=sbom_link),
@@ -150,6 +178,7 @@ def _get_AdbWinApi(  # noqa: N802
     return result
 
 
+@functools.cache
 def _get_windows_version() -> str:
     try:
         import winreg
@@ -161,11 +190,11 @@ def _get_windows_version() -> str:
         )
     # Use the version from platform module with the update revision added from the
     # registry.
-    reg_key = winreg.OpenKey(
+    # The key is closed even if the query fails.
+    with winreg.OpenKey(
         winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion"
-    )
-    ubr, _ = winreg.QueryValueEx(reg_key, "UBR")
-    winreg.CloseKey(reg_key)
+    ) as reg_key:
+        ubr, _ = winreg.QueryValueEx(reg_key, "UBR")
     return f"{platform.version()}.{ubr}"
 
 
@@ -211,14 +240,14 @@ class _MSYS2_package_versions(typing.NamedTuple):  # noqa: N801
                 "SBOMs generated with this flag in production!"
             )
         proc = subprocess.run(
-            args=list(itertools.chain([pacman_exe, "-Q"], pkg_mapping.keys())),
+            args=[pacman_exe, "-Q", *pkg_mapping],
             text=True,
             capture_output=True,
             check=True,
         )
         result = {}
         for keyver_line in proc.stdout.splitlines():
-            pkgname, version = keyver_line.split()
+            pkgname, _, version = keyver_line.partition(" ")
             result[pkg_mapping[pkgname]] = version
         assert len(result) == len(pkg_mapping)
         assert all(name in result for name in pkg_mapping.values())
@@ -272,6 +301,17 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
+    # These modules are only needed to generate the SBOM. They are imported after the
+    # arguments are parsed, so that --help and argument errors don't have to wait for
+    # them.
+    import base_versions
+    import cyclonedx.generators
+    import git.submodule_parsing
+    import high_level.document
+    import meson.depmf
+    import meson.wrap_info
+    from purldb.generate import generate as purldb_mod_generate
+
     #
     # Preliminary command line argument processing.
     #
@@ -280,29 +320,10 @@ if __name__ == "__main__":
     depmf_wrap_dict = meson.depmf.get_subproject_data(args.meson_depmf_file)
 
     # Infer some info from the depmf.json file.
-    project_version = depmf_wrap_dict["android-tools-static"].version
+    project_version = meson.depmf.get_version(depmf_wrap_dict, "android-tools-static")
     uses_bundled_libusb = args.uses_bundled_libusb == "true"
 
-    assert project_version is not None
-
-    match args.color:
-        case "always":
-            color = True
-        case "never":
-            color = False
-        case "auto":
-            # https://no-color.org/
-            if "NO_COLOR" in os.environ and len(os.environ["NO_COLOR"]) != 0:
-                color = False
-            else:
-                color = sys.stderr.isatty()
-        case _:
-            sys.exit(
-                f"Unknown color value '{args.color}'! This is likely a bug in the "
-                "script"
-            )
-
-    if color:
+    if args.color:
         warnings.formatwarning = base.ansi_warning_format
 
     target = base.Target(args.target_architecture, base.TargetOS.WINDOWS)
@@ -310,7 +331,7 @@ if __name__ == "__main__":
     #
     # Look for git.
     #
-    git_path = shutil.which("git")
+    git_path = base.find_git()
     if git_path is None:
         sys.exit("Couldn't find 'git' executable! Cannot proceed with SBOM generation.")
 
@@ -348,6 +369,12 @@ if __name__ == "__main__":
     )
 
     wraps = meson.wrap_info.get_wraps_info(depmf_wrap_dict, source_dir, target)
+    nmeum_patch_list = high_level.document.read_patch_series(
+        args.nmeum_patch_series_file, source_dir
+    )
+    added_patch_list = high_level.document.read_patch_series(
+        args.added_patch_series_file, source_dir
+    )
 
     #
     # Assemble the input into processed components shared across all SBOM entrypoint
@@ -375,8 +402,8 @@ if __name__ == "__main__":
         args.github_runner_name_ver,
         args.softprops_action_gh_release_version,
         args.base_repolink,
-        args.nmeum_patch_series_file,
-        args.added_patch_series_file,
+        nmeum_patch_list,
+        added_patch_list,
         submodule_info,
         wraps,
         depmf_wrap_dict,
@@ -386,34 +413,38 @@ if __name__ == "__main__":
     #
     # Handle Windows-specific stuff.
     #
-    adbwinapi_version = depmf_wrap_dict["AdbWinApi"].version
+    adbwinapi_version = meson.depmf.get_version(depmf_wrap_dict, "AdbWinApi")
 
-    assert adbwinapi_version is not None
-
-    purldb[PurlNames.adbwinapi] = proj_types.Purl(
-        f"{PurlNames.adbwinapi}@{adbwinapi_version}"
-    )
-    purldb[PurlNames.windows] = proj_types.Purl(
-        f"{PurlNames.windows}@{windows_version}"
-    )
-    purldb[PurlNames.msys2_meson] = proj_types.Purl(
-        f"pkg:msys2/{args.meson_pkg_name}@{msys2_package_versions.meson}"
-    )
-    purldb[PurlNames.msys2_gcc] = proj_types.Purl(
-        f"pkg:msys2/{args.gcc_pkg_name}@{msys2_package_versions.gcc}"
-    )
-    purldb[PurlNames.msys2_cmake] = proj_types.Purl(
-        f"pkg:msys2/{args.cmake_pkg_name}@{msys2_package_versions.cmake}"
-    )
-    purldb[PurlNames.msys2_nasm] = proj_types.Purl(
-        f"pkg:msys2/{args.nasm_pkg_name}@{msys2_package_versions.nasm}"
+    purldb.update(
+        {
+            purl: proj_types.Purl(purl + "@" + ver)
+            for purl, ver in (
+                (PurlNames.adbwinapi, adbwinapi_version),
+                (PurlNames.windows, windows_version),
+                (PurlNames.setup_msys2, args.setup_msys2_version),
+            )
+        }
     )
-    purldb[PurlNames.setup_msys2] = proj_types.Purl(
-        f"{PurlNames.setup_msys2}@{args.setup_msys2_version}"
+    purldb.update(
+        {
+            purl: proj_types.Purl("pkg:msys2/" + pkg_name + "@" + ver)
+            for purl, pkg_name, ver in (
+                (
+                    PurlNames.msys2_meson,
+                    args.meson_pkg_name,
+                    msys2_package_versions.meson,
+                ),
+                (PurlNames.msys2_gcc, args.gcc_pkg_name, msys2_package_versions.gcc),
+                (
+                    PurlNames.msys2_cmake,
+                    args.cmake_pkg_name,
+                    msys2_package_versions.cmake,
+                ),
+                (PurlNames.msys2_nasm, args.nasm_pkg_name, msys2_package_versions.nasm),
+            )
+        }
     )
 
-    msys2_supplier = ComponentSupplier(name="MSYS2", url="https://www.msys2.org/")
-
     setup_msys2 = cyclonedx.generic_component.generate(
         name="msys2/setup-msys2",
         version=args.setup_msys2_version,
@@ -423,7 +454,7 @@ if __name__ == "__main__":
             "GitHub Action used to setup MSYS2 build environment and to install MSYS2 "
             "dependencies"
         ),
-        supplier=ComponentSupplier(name="GitHub, Inc.", url="https://github.com/"),
+        supplier=_GITHUB_SUPPLIER,
         references=[
             cyclonedx.generic_component.generate_reference(
                 type=ReferenceType.website, url="https://github.com/msys2/setup-msys2"
@@ -436,113 +467,80 @@ if __name__ == "__main__":
         "https://github.com/msys2/setup-msys2/blob/main/LICENSE",
     )
 
-    windows_components = [
-        _get_AdbWinApi(source_dir, purldb, adbwinapi_version, target),
-        cyclonedx.generic_component.generate(
-            name="Microsoft Windows",
-            version=windows_version,
-            c_type=ComponentType.operating_system,
-            ref=purldb[PurlNames.windows],
-        ),
-        cyclonedx.generic_component.generate(
-            name="Meson",
-            version=msys2_package_versions.meson,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.msys2_meson],
-            description="Meson build system",
-            supplier=msys2_supplier,
-            properties={
-                "msys2_pkg_name": (
-                    f"{args.meson_pkg_name}-{msys2_package_versions.meson}"
-                )
-            },
-        ),
-        cyclonedx.generic_component.generate(
-            name="GCC",
-            version=msys2_package_versions.gcc,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.msys2_gcc],
-            description="GNU Compiler Collection with MSYS2 additions",
-            supplier=msys2_supplier,
-            properties={
-                "msys2_pkg_name": f"{args.gcc_pkg_name}-{msys2_package_versions.gcc}"
-            },
-        ),
-        cyclonedx.generic_component.generate(
-            name="CMake",
-            version=msys2_package_versions.cmake,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.msys2_cmake],
-            description="CMake build system",
-            supplier=msys2_supplier,
-            properties={
-                "msys2_pkg_name": (
-                    f"{args.cmake_pkg_name}-{msys2_package_versions.cmake}"
-                )
-            },
-        ),
-        cyclonedx.generic_component.generate(
-            name="NASM",
-            version=msys2_package_versions.nasm,
-            c_type=ComponentType.application,
-            ref=purldb[PurlNames.msys2_nasm],
-            description="Netwide Assembler",
-            supplier=msys2_supplier,
-            properties={
-                "msys2_pkg_name": f"{args.nasm_pkg_name}-{msys2_package_versions.nasm}"
-            },
-        ),
-        setup_msys2,
-    ]
+    document["components"].extend(
+        (
+            _get_AdbWinApi(source_dir, purldb, adbwinapi_version, target),
+            cyclonedx.generic_component.generate(
+                name="Microsoft Windows",
+                version=windows_version,
+                c_type=ComponentType.operating_system,
+                ref=purldb[PurlNames.windows],
+            ),
+            cyclonedx.generic_component.generate(
+                name="Meson",
+                version=msys2_package_versions.meson,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.msys2_meson],
+                description="Meson build system",
+                supplier=_MSYS2_SUPPLIER,
+                properties={
+                    "msys2_pkg_name": (
+                        f"{args.meson_pkg_name}-{msys2_package_versions.meson}"
+                    )
+                },
+            ),
+            cyclonedx.generic_component.generate(
+                name="GCC",
+                version=msys2_package_versions.gcc,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.msys2_gcc],
+                description="GNU Compiler Collection with MSYS2 additions",
+                supplier=_MSYS2_SUPPLIER,
+                properties={
+                    "msys2_pkg_name": (
+                        f"{args.gcc_pkg_name}-{msys2_package_versions.gcc}"
+                    )
+                },
+            ),
+            cyclonedx.generic_component.generate(
+                name="CMake",
+                version=msys2_package_versions.cmake,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.msys2_cmake],
+                description="CMake build system",
+                supplier=_MSYS2_SUPPLIER,
+                properties={
+                    "msys2_pkg_name": (
+                        f"{args.cmake_pkg_name}-{msys2_package_versions.cmake}"
+                    )
+                },
+            ),
+            cyclonedx.generic_component.generate(
+                name="NASM",
+                version=msys2_package_versions.nasm,
+                c_type=ComponentType.application,
+                ref=purldb[PurlNames.msys2_nasm],
+                description="Netwide Assembler",
+                supplier=_MSYS2_SUPPLIER,
+                properties={
+                    "msys2_pkg_name": (
+                        f"{args.nasm_pkg_name}-{msys2_package_versions.nasm}"
+                    )
+                },
+            ),
+            setup_msys2,
+        )
+    )
 
-    document["components"].extend(windows_components)
+    libusb_purl = PurlNames.libusb if uses_bundled_libusb else PurlNames.wrap_libusb
 
     document["dependencies"] = [
         {
             "ref": purldb[PurlNames.android_tools_static],
             "dependsOn": [
-                purldb[PurlNames.github_runner],
-                purldb[PurlNames.action_gh_release],
-                purldb[PurlNames.ags_core],
-                purldb[PurlNames.ags_extras],
-                # purldb[PurlNames.ags_f2fs_tools]
-                # purldb[PurlNames.ags_e2fsprogs]
-                purldb[PurlNames.boringssl],
-                purldb[PurlNames.ags_mkbootimg],
-                purldb[PurlNames.ags_avb],
-                purldb[PurlNames.ags_libbase],
-                purldb[PurlNames.ags_libziparchive],
-                purldb[PurlNames.ags_adb],
-                purldb[PurlNames.ags_logging],
-                # purldb[PurlNames.ags_libufdt]
-                purldb[PurlNames.wrap_fmt],
-                purldb[PurlNames.wrap_zlib],
-                purldb[PurlNames.wrap_google_brotli],
-                purldb[PurlNames.wrap_lz4],
-                purldb[PurlNames.wrap_zstd],
-                purldb[PurlNames.wrap_gtest],
-                purldb[PurlNames.wrap_abseil_cpp],
-                purldb[PurlNames.wrap_protobuf],
-                purldb[PurlNames.wrap_pcre2],
-                purldb[PurlNames.adbwinapi],
-                purldb[PurlNames.windows],
-                purldb[PurlNames.msys2_meson],
-                purldb[PurlNames.msys2_gcc],
-                purldb[PurlNames.msys2_cmake],
-                purldb[PurlNames.msys2_nasm],
-                purldb[PurlNames.setup_msys2],
+                purldb[purl] for purl in (*_WINDOWS_DEPENDS_KEYS, libusb_purl)
             ],
         }
     ]
 
-    dependsOn = document["dependencies"][0]["dependsOn"]  # noqa: N816
-
-    if uses_bundled_libusb:
-        dependsOn.append(purldb[PurlNames.libusb])
-    else:
-        dependsOn.append(purldb[PurlNames.wrap_libusb])
-
-    try:
-        json.dump(document, sys.stdout)
-    except OSError as exc:
-        sys.exit(str(exc))
+    base.write_output(base.encode_document(document))
@@ -25,50 +25,46 @@ container.
 import argparse
 import json
 import sys
-import typing
 
+# Keys of the resulting JSON document. The command line flag of each key is derived
+# from its last path component (docker/bake-action -> --bake-action-version).
+_VERSION_KEYS = (
+    "alpine",
+    "musl-cross-make",
+    "binutils",
+    "gcc",
+    "musl",
+    "gmp",
+    "mpc",
+    "mpfr",
+    "linux",
+    "isl",
+    "docker/setup-buildx-action",
+    "docker/login-action",
+    "docker/metadata-action",
+    "docker/bake-action",
+)
 
-class _VersionInfo(typing.NamedTuple):
-    version_flag_base: str
 
+def _get_flag_name(key_name: str) -> str:
+    return f"--{key_name.rpartition('/')[2]}-version"
 
-if __name__ == "__main__":
-    _VI = _VersionInfo
-    result_mapping = {
-        "alpine": _VI("alpine"),
-        "musl-cross-make": _VI("musl-cross-make"),
-        "binutils": _VI("binutils"),
-        "gcc": _VI("gcc"),
-        "musl": _VI("musl"),
-        "gmp": _VI("gmp"),
-        "mpc": _VI("mpc"),
-        "mpfr": _VI("mpfr"),
-        "linux": _VI("linux"),
-        "isl": _VI("isl"),
-        "docker/setup-buildx-action": _VI("setup-buildx-action"),
-        "docker/login-action": _VI("login-action"),
-        "docker/metadata-action": _VI("metadata-action"),
-        "docker/bake-action": _VI("bake-action"),
-    }
 
+if __name__ == "__main__":
     parser = argparse.ArgumentParser()
 
-    for key_name, flag_base in result_mapping.items():
-        parser.add_argument(
-            f"--{flag_base.version_flag_base}-version", required=True, dest=key_name
-        )
+    for key_name in _VERSION_KEYS:
+        parser.add_argument(_get_flag_name(key_name), required=True, dest=key_name)
 
     args = parser.parse_args()
 
     result = {}
 
-    for key_name, flag_base in result_mapping.items():
+    for key_name in _VERSION_KEYS:
         version = getattr(args, key_name)
         if not version:
-            sys.exit(
-                f"Flag --{flag_base.version_flag_base}-version must not have empty "
-                "version!"
-            )
+            sys.exit(f"Flag {_get_flag_name(key_name)} must not have empty version!")
         result[key_name] = version
 
-    json.dump(result, sys.stdout)
+    # Serialize the whole document first and write it at once.
+    sys.stdout.write(json.dumps(result, separators=(",", ":")))